@@ -18,7 +18,7 @@
 
 import bpy
 import importlib
-from . import ui, operators, functions, properties, template
+from . import ui, operators, functions, properties, template, cache, library, compact, stream, pack, guess
 
 bl_info = {
     "name": "Armature Templates",
@@ -33,6 +33,12 @@ bl_info = {
 }
 
 modules = (
+    cache,
+    library,
+    compact,
+    stream,
+    pack,
+    guess,
     template,
     functions,
     properties,
@@ -0,0 +1,434 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+import os
+import json
+import hashlib
+import sqlite3
+import time
+import tempfile
+import threading
+from types import MappingProxyType
+
+
+def freeze_json_data(data):
+    if isinstance(data, dict):
+        return MappingProxyType(
+            {key: freeze_json_data(value) for key, value in data.items()}
+        )
+    if isinstance(data, list):
+        return tuple(freeze_json_data(value) for value in data)
+    return data
+
+
+def thaw_json_data(data):
+    if isinstance(data, MappingProxyType) or isinstance(data, dict):
+        return {key: thaw_json_data(value) for key, value in data.items()}
+    if isinstance(data, tuple) or isinstance(data, list):
+        return [thaw_json_data(value) for value in data]
+    return data
+
+
+def text_digest(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def json_digest(data):
+    return text_digest(json.dumps(
+        thaw_json_data(data), ensure_ascii=False, separators=(',', ':')
+    ))
+
+
+def file_signature(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class Json_Cache:
+    # absolute path: (signature, frozen data)
+    documents = dict([])
+    # absolute path: (signature, content digest)
+    digests = dict([])
+    lock = threading.RLock()
+    hits = 0
+    misses = 0
+
+    @classmethod
+    def key(cls, file_path):
+        return os.path.normcase(os.path.abspath(file_path))
+
+    @classmethod
+    def get(cls, file_path):
+        key = cls.key(file_path)
+        pending_data = Json_Saver.get_pending(key)
+        if pending_data is not None:
+            return freeze_json_data(pending_data)
+        signature = file_signature(key)
+        if signature is None:
+            cls.invalidate(key)
+            return None
+        with cls.lock:
+            cached = cls.documents.get(key)
+            if cached and cached[0] == signature:
+                cls.hits += 1
+                return cached[1]
+        with open(key, encoding='utf-8') as f:
+            data = freeze_json_data(json.load(f))
+        with cls.lock:
+            cls.misses += 1
+            cls.documents[key] = (signature, data)
+        return data
+
+    @classmethod
+    def digest(cls, file_path):
+        key = cls.key(file_path)
+        pending_data = Json_Saver.get_pending(key)
+        if pending_data is not None:
+            return json_digest(pending_data)
+        return cls.file_digest(key)
+
+    @classmethod
+    def file_digest(cls, file_path):
+        # digest of the file on disk, ignoring the data waiting to be saved
+        key = cls.key(file_path)
+        signature = file_signature(key)
+        if signature is None:
+            return None
+        with cls.lock:
+            cached = cls.digests.get(key)
+            if cached and cached[0] == signature:
+                return cached[1]
+        with open(key, encoding='utf-8') as f:
+            digest = json_digest(json.load(f))
+        with cls.lock:
+            cls.digests[key] = (signature, digest)
+        return digest
+
+    @classmethod
+    def is_unchanged(cls, file_path, data):
+        try:
+            digest = cls.file_digest(file_path)
+        except (OSError, ValueError):
+            return False
+        return digest is not None and digest == json_digest(data)
+
+    @classmethod
+    def invalidate(cls, file_path=None):
+        with cls.lock:
+            if file_path is None:
+                cls.documents.clear()
+                cls.digests.clear()
+                return None
+            cls.documents.pop(cls.key(file_path), None)
+            cls.digests.pop(cls.key(file_path), None)
+
+    @classmethod
+    def stats(cls):
+        return {
+            'documents': len(cls.documents),
+            'hits': cls.hits,
+            'misses': cls.misses,
+        }
+
+    @classmethod
+    def reset_stats(cls):
+        cls.hits = 0
+        cls.misses = 0
+
+
+class Directory_Index:
+    # absolute path: (signature, file names)
+    directories = dict([])
+    # (paths, skip names): (file name lists, enum items)
+    enums = dict([])
+    lock = threading.RLock()
+
+    @classmethod
+    def key(cls, path):
+        return os.path.normcase(os.path.abspath(path))
+
+    @classmethod
+    def list_files(cls, path):
+        key = cls.key(path)
+        try:
+            stat = os.stat(key)
+        except OSError:
+            with cls.lock:
+                cls.directories.pop(key, None)
+            return ()
+        signature = (stat.st_mtime_ns, stat.st_ino)
+        with cls.lock:
+            cached = cls.directories.get(key)
+            if cached and cached[0] == signature:
+                return cached[1]
+        try:
+            files = tuple(sorted(
+                entry.name for entry in os.scandir(key) if entry.is_file()
+            ))
+        except OSError:
+            with cls.lock:
+                cls.directories.pop(key, None)
+            return ()
+        with cls.lock:
+            cls.directories[key] = (signature, files)
+        return files
+
+    @classmethod
+    def list_names(cls, path, extension='.json', full_name=False):
+        names = []
+        for file in cls.list_files(path):
+            if not file.lower().endswith(extension):
+                continue
+            if full_name:
+                names.append(file)
+                continue
+            names.append(file.split(extension)[0])
+        return names
+
+    @classmethod
+    def enum_items(cls, paths, extension='.json', skip_name_list=()):
+        # paths are folder paths or (folder path, extension) pairs
+        paths = tuple(
+            path if isinstance(path, tuple) else (path, extension)
+            for path in paths
+        )
+        key = (paths, tuple(skip_name_list))
+        files = tuple(cls.list_files(path) for path, ext in paths)
+        with cls.lock:
+            cached = cls.enums.get(key)
+            if cached and all(a is b for a, b in zip(cached[0], files)):
+                return cached[1]
+        items = []
+        names = set(skip_name_list)
+        for path, ext in paths:
+            for name in cls.list_names(path, extension=ext):
+                if name in names:
+                    continue
+                names.add(name)
+                items.append((name, name, '', len(items)))
+        with cls.lock:
+            cls.enums[key] = (files, items)
+        return items
+
+    @classmethod
+    def invalidate(cls, path=None):
+        with cls.lock:
+            cls.enums.clear()
+            if path is None:
+                cls.directories.clear()
+                return None
+            cls.directories.pop(cls.key(path), None)
+
+
+def write_json_file(file_path, save_data):
+    directory, name = os.path.split(file_path)
+    fd, temp_path = tempfile.mkstemp(
+        prefix='.' + name + '.', suffix='.tmp', dir=directory
+    )
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(save_data, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class Json_Saver:
+    # absolute path: data waiting to be written
+    pending = dict([])
+    # absolute path: data that is being written
+    writing = dict([])
+    # [(absolute path, error), ...]
+    errors = []
+    # absolute paths of the saves that report a file left unchanged
+    report_unchanged = set()
+    # [absolute path, ...] of the reported saves that did not change the file
+    unchanged = []
+    condition = threading.Condition()
+    thread = None
+    saved = 0
+    coalesced = 0
+
+    @classmethod
+    def save(cls, file_path, save_data, report_unchanged=False):
+        key = Json_Cache.key(file_path)
+        data = thaw_json_data(save_data)
+        with cls.condition:
+            if key in cls.pending:
+                cls.coalesced += 1
+            cls.pending[key] = data
+            if report_unchanged:
+                cls.report_unchanged.add(key)
+            cls.start()
+            cls.condition.notify_all()
+
+    @classmethod
+    def get_pending(cls, file_path):
+        key = Json_Cache.key(file_path)
+        with cls.condition:
+            data = cls.pending.get(key)
+            if data is None:
+                data = cls.writing.get(key)
+            return data
+
+    @classmethod
+    def start(cls):
+        if cls.thread is not None and cls.thread.is_alive():
+            return None
+        cls.thread = threading.Thread(
+            target=cls.run, name="Armature Templates Saver", daemon=True
+        )
+        cls.thread.start()
+
+    @classmethod
+    def run(cls):
+        while True:
+            with cls.condition:
+                while not cls.pending:
+                    cls.condition.wait()
+                key = next(iter(cls.pending))
+                data = cls.pending.pop(key)
+                cls.writing[key] = data
+            try:
+                # compared here to keep the serialization off the main thread
+                written = not Json_Cache.is_unchanged(key, data)
+                if written:
+                    write_json_file(key, data)
+                    cls.saved += 1
+                with cls.condition:
+                    if not written and key in cls.report_unchanged:
+                        cls.unchanged.append(key)
+            except (OSError, TypeError, ValueError) as error:
+                with cls.condition:
+                    cls.errors.append((key, error))
+            finally:
+                with cls.condition:
+                    cls.writing.pop(key, None)
+                    if key not in cls.pending:
+                        cls.report_unchanged.discard(key)
+                    Json_Cache.invalidate(key)
+                    Directory_Index.invalidate(os.path.dirname(key))
+                    cls.condition.notify_all()
+
+    @classmethod
+    def flush(cls, timeout=None):
+        with cls.condition:
+            cls.condition.wait_for(
+                lambda: not cls.pending and not cls.writing, timeout=timeout
+            )
+        return cls.take_errors()
+
+
+    @classmethod
+    def is_busy(cls):
+        with cls.condition:
+            return bool(cls.pending or cls.writing)
+
+    @classmethod
+    def take_errors(cls):
+        with cls.condition:
+            errors = list(cls.errors)
+            cls.errors.clear()
+        return errors
+
+    @classmethod
+    def take_unchanged(cls):
+        with cls.condition:
+            unchanged = list(cls.unchanged)
+            cls.unchanged.clear()
+        return unchanged
+
+    @classmethod
+    def stats(cls):
+        return {
+            'pending': len(cls.pending) + len(cls.writing),
+            'saved': cls.saved,
+            'coalesced': cls.coalesced,
+        }
+
+
+class Json_Preloader:
+    thread = None
+    files = 0
+    errors = 0
+    seconds = 0.0
+    finished = False
+
+    @classmethod
+    def is_running(cls):
+        return cls.thread is not None and cls.thread.is_alive()
+
+    @classmethod
+    def start(cls, template_paths, mapping_paths, library=None):
+        if cls.is_running():
+            return None
+        cls.finished = False
+        cls.thread = threading.Thread(
+            target=cls.run, args=(template_paths, mapping_paths, library),
+            name="Armature Templates Preload", daemon=True
+        )
+        cls.thread.start()
+
+    @classmethod
+    def run(cls, template_paths, mapping_paths, library=None):
+        start = time.perf_counter()
+        files = 0
+        errors = 0
+        file_paths = []
+        folders = list(template_paths)
+        for path in mapping_paths:
+            try:
+                folders += [entry.path for entry in os.scandir(path) if entry.is_dir()]
+            except OSError:
+                continue
+        for folder in folders:
+            try:
+                file_paths += [
+                    os.path.join(folder, name)
+                    for name in Directory_Index.list_names(folder, full_name=True)
+                ]
+            except OSError:
+                errors += 1
+        for file_path in file_paths:
+            try:
+                Json_Cache.get(file_path)
+                files += 1
+            except (OSError, ValueError):
+                errors += 1
+        if library is not None and library.is_open():
+            try:
+                for template in library.list_templates():
+                    library.get_template(template)
+                    files += 1
+                    for mapping in library.list_mappings(template):
+                        library.get_mapping(template, mapping)
+                        files += 1
+            except (AttributeError, sqlite3.Error, ValueError):
+                # the library was closed or switched while it was read
+                errors += 1
+        cls.files = files
+        cls.errors = errors
+        cls.seconds = time.perf_counter() - start
+        cls.finished = True
@@ -0,0 +1,198 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Compact template container, stored next to the .json template:
+#   header | category table | name indices | string offsets | utf-8 string pool
+# The header keeps the signature (mtime_ns, size) of the source .json file.
+# Category names and bone names are interned in the string pool, so a single
+# category can be decoded without touching the rest of the template.
+
+import os
+import struct
+import tempfile
+import threading
+from .cache import file_signature
+
+EXTENSION = '.atc'
+MAGIC = b'ATCT'
+VERSION = 2
+HEADER = struct.Struct('<4sHHIIIqQ')
+CATEGORY = struct.Struct('<III')
+OFFSET = struct.Struct('<I')
+
+
+def pack_template(template_data, source_signature=(0, 0)):
+    strings = []
+    string_index = {}
+
+    def intern(text):
+        index = string_index.get(text)
+        if index is None:
+            index = len(strings)
+            string_index[text] = index
+            strings.append(text)
+        return index
+
+    category_table = []
+    items = []
+    for category in template_data:
+        names = template_data.get(category)
+        category_table.append((intern(category), len(items), len(names)))
+        items += [intern(name) for name in names]
+
+    encoded = [text.encode('utf-8') for text in strings]
+    offsets = [0]
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+
+    pool_offset = HEADER.size + CATEGORY.size * len(category_table) + OFFSET.size * len(items)
+    chunks = [HEADER.pack(
+        MAGIC, VERSION, 0, len(category_table), len(strings), pool_offset, *source_signature
+    )]
+    chunks += [CATEGORY.pack(*category) for category in category_table]
+    chunks.append(struct.pack(f'<{len(items)}I', *items))
+    chunks.append(struct.pack(f'<{len(offsets)}I', *offsets))
+    chunks += encoded
+    return b''.join(chunks)
+
+
+def write_compact_template(file_path, template_data, source_signature=(0, 0)):
+    directory, name = os.path.split(file_path)
+    fd, temp_path = tempfile.mkstemp(prefix='.' + name + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(pack_template(template_data, source_signature))
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def compact_template_path(json_file_path):
+    return os.path.splitext(json_file_path)[0] + EXTENSION
+
+
+class Compact_Template:
+    # absolute path: (signature, reader)
+    readers = dict([])
+    # absolute path: source signature of a write that failed
+    failed_writes = dict([])
+    lock = threading.RLock()
+
+    def __init__(self, buffer):
+        if len(buffer) < HEADER.size:
+            raise ValueError("Not a compact template file")
+        magic, version, _, category_count, string_count, pool_offset, mtime_ns, size = \
+            HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a compact template file")
+        self.source_signature = (mtime_ns, size)
+        self.buffer = buffer
+        self.string_count = string_count
+        self.pool_offset = pool_offset
+        self.items_offset = HEADER.size + CATEGORY.size * category_count
+        self.blob_offset = pool_offset + OFFSET.size * (string_count + 1)
+        self.strings = dict([])
+        self.decoded = dict([])
+        self.category_table = dict([])
+        names = []
+        for i in range(category_count):
+            name_index, first, count = CATEGORY.unpack_from(
+                buffer, HEADER.size + CATEGORY.size * i
+            )
+            name = self.string(name_index)
+            self.category_table[name] = (first, count)
+            names.append(name)
+        self.category_names = tuple(names)
+
+    def string(self, index):
+        text = self.strings.get(index)
+        if text is not None:
+            return text
+        start, end = struct.unpack_from('<II', self.buffer, self.pool_offset + OFFSET.size * index)
+        text = bytes(self.buffer[self.blob_offset + start:self.blob_offset + end]).decode('utf-8')
+        self.strings[index] = text
+        return text
+
+    def categories(self):
+        return self.category_names
+
+    def __iter__(self):
+        return iter(self.category_names)
+
+    def get(self, name):
+        return self.category(name)
+
+    def category(self, name):
+        items = self.decoded.get(name)
+        if items is not None:
+            return items
+        location = self.category_table.get(name)
+        if location is None:
+            return None
+        first, count = location
+        indices = struct.unpack_from(
+            f'<{count}I', self.buffer, self.items_offset + OFFSET.size * first
+        )
+        items = tuple(self.string(i) for i in indices)
+        self.decoded[name] = items
+        return items
+
+    @classmethod
+    def load(cls, file_path):
+        key = os.path.normcase(os.path.abspath(file_path))
+        signature = file_signature(key)
+        if signature is None:
+            return None
+        with cls.lock:
+            cached = cls.readers.get(key)
+            if cached and cached[0] == signature:
+                return cached[1]
+        with open(key, 'rb') as f:
+            reader = cls(f.read())
+        with cls.lock:
+            cls.readers[key] = (signature, reader)
+        return reader
+
+    @classmethod
+    def write(cls, file_path, template_data, source_signature):
+        # a failed write is not retried until the source file changes,
+        # the native templates folder may be read-only
+        key = os.path.normcase(os.path.abspath(file_path))
+        with cls.lock:
+            if cls.failed_writes.get(key) == source_signature:
+                return None
+        try:
+            write_compact_template(key, template_data, source_signature)
+            return cls.load(key)
+        except (OSError, ValueError):
+            with cls.lock:
+                cls.failed_writes[key] = source_signature
+            return None
+
+    @classmethod
+    def invalidate(cls, file_path=None):
+        with cls.lock:
+            if file_path is None:
+                cls.readers.clear()
+                cls.failed_writes.clear()
+                return None
+            key = os.path.normcase(os.path.abspath(file_path))
+            cls.readers.pop(key, None)
+            cls.failed_writes.pop(key, None)
@@ -19,8 +19,23 @@
 import bpy
 import os
 import json
+import struct
+import zipfile
+from types import MappingProxyType
 from math import radians, degrees
+from mathutils import Vector
 import numpy as np
+from bpy.app.handlers import persistent
+from .cache import (
+    Json_Cache, Json_Saver, Json_Preloader, Directory_Index,
+    thaw_json_data, file_signature
+)
+from .compact import Compact_Template, compact_template_path
+from .library import Template_Library
+from .stream import Json_Stream
+from .pack import Mapping_Pack, write_mapping_pack
+from .guess import split_name
+from . import pack
 
 
 def props(context=None):
@@ -30,10 +45,25 @@ def props(context=None):
 
 
 def set_bone_list_layer(index_list, value=True):
-    for i in range(32):
-        if i not in index_list:
-            continue
-        setattr(props(), "armature_layer_" + str(i), value)
+    bools = list(props().armature_layers)
+    for i in index_list:
+        bools[i] = value
+    set_select_bone_layers(bools)
+
+
+def encode_bone_list(bools):
+    mask = 0
+    for i, b in enumerate(bools):
+        if b:
+            mask |= 1 << i
+    return format(mask, '08x')
+
+
+def decode_bone_list(bone_list):
+    if ' ' in bone_list:
+        return [bool(int(b)) for b in bone_list.split(' ')]
+    mask = int(bone_list, 16)
+    return [bool(mask >> i & 1) for i in range(32)]
 
 
 def at_initialization(cls):
@@ -49,13 +79,7 @@ def get_layer_bones(context, layer_index, obj):
         obj = context.active_object
     if obj.type != 'ARMATURE':
         return []
-    bones = []
-    for b in obj.pose.bones:
-        if not b.bone:
-            continue
-        if b.bone.layers[layer_index]:
-            bones.append(b)
-    return bones
+    return get_pose_bones_by_index(obj, Layer_Bones_Index.get(obj, [layer_index]))
 
 
 def check_extension(name, extension='.json'):
@@ -71,18 +95,50 @@ def base_file_name(name, extension='.json'):
     return name
 
 
-def get_json_data(json_file_path):
-    if not os.path.isfile(json_file_path):
-        return None
-    f = open(json_file_path)
-    file_data = json.load(f)
-    f.close()
+def get_json_data(json_file_path, mutable=False):
+    file_data = Json_Cache.get(json_file_path)
+    if mutable:
+        return thaw_json_data(file_data)
     return file_data
 
 
-def save_json_data(json_file_path, save_data):
-    with open(json_file_path, 'w', encoding='utf-8') as f:
-        json.dump(save_data, f, ensure_ascii=False, indent=4)
+def save_json_data(json_file_path, save_data, report_unchanged=False):
+    # the worker skips the write if the file already holds the same data
+    Json_Saver.save(json_file_path, save_data, report_unchanged=report_unchanged)
+    if not bpy.app.timers.is_registered(check_save_errors):
+        bpy.app.timers.register(check_save_errors, first_interval=0.5)
+
+
+def report_save_errors(operator, errors):
+    for file_path, error in errors:
+        operator.report({'ERROR'}, "Failed to save " + file_path + ": " + str(error))
+    return bool(errors)
+
+
+def check_save_errors():
+    # shows the errors of the background saves that no operator has reported
+    # and the saves that left their file unchanged
+    if Json_Saver.is_busy():
+        return 0.5
+    errors = Json_Saver.take_errors()
+    unchanged = Json_Saver.take_unchanged()
+    if errors:
+        def draw(self, context):
+            for file_path, error in errors:
+                self.layout.label(text=file_path + ": " + str(error))
+
+        bpy.context.window_manager.popup_menu(
+            draw, title="Armature Templates: Saving failed", icon='ERROR'
+        )
+    elif unchanged:
+        def draw(self, context):
+            for file_path in unchanged:
+                self.layout.label(text=file_path)
+
+        bpy.context.window_manager.popup_menu(
+            draw, title="Armature Templates: The mapping is unchanged", icon='INFO'
+        )
+    return None
 
 
 def write_to_file(file_path, text):
@@ -90,6 +146,7 @@ def write_to_file(file_path, text):
     if text is not None:
         file.write(text)
     file.close()
+    Directory_Index.invalidate(os.path.dirname(file_path))
 
 
 def draw_ulist_item(self, layout, item, active_data, active_propname):
@@ -158,14 +215,16 @@ def select_ulist_items(item_list, select=True, invert=False):
 
 
 def evaluate_bone_list(context, obj, template_data):
-    added_bones = []
-    bones = get_bones_in_selected_layers(context, obj)
+    added_bones = set()
     for category in template_data:
-        added_bones += template_data.get(category)
-    return [
-        b.name for b in bones
-        if b.name not in added_bones
-    ]
+        added_bones.update(template_data.get(category))
+    if obj is None:
+        obj = context.active_object
+    if obj.type != 'ARMATURE':
+        return []
+    index_list = get_selected_bone_layers(context)
+    bone_names = Bone_Index.get_names(obj.data, Layer_Bones_Index.get(obj, index_list))
+    return [name for name in bone_names if name not in added_bones]
 
 
 def validate_path(path):
@@ -173,12 +232,50 @@ def validate_path(path):
         os.mkdir(path, mode=0o777)
 
 
-def get_config_path():
-    user_path = bpy.utils.resource_path('USER')
-    config_path = os.path.join(user_path, "config")
-    config_path = os.path.join(config_path, "armature_templates")
-    validate_path(config_path)
-    return config_path
+class Config_Paths:
+    env_variable = "ARMATURE_TEMPLATES_CONFIG"
+    folders = ("templates", "bone_mapping", "metarigs", "packs")
+    root = ''
+    validated = set()
+
+    @classmethod
+    def resolve(cls):
+        root = os.environ.get(cls.env_variable)
+        if not root:
+            user_path = bpy.utils.resource_path('USER')
+            root = os.path.join(user_path, "config", "armature_templates")
+        cls.root = os.path.abspath(os.path.expanduser(root))
+        cls.validated = set()
+        for folder in cls.folders:
+            cls.validate(os.path.join(cls.root, folder))
+        native_path = os.path.join(os.path.dirname(__file__), "templates")
+        config_path = os.path.join(cls.root, "templates")
+        for path in (native_path, config_path):
+            for template in Directory_Index.list_names(path):
+                cls.validate(os.path.join(cls.root, "bone_mapping", template))
+        return cls.root
+
+    @classmethod
+    def validate(cls, path):
+        if path in cls.validated:
+            return path
+        os.makedirs(path, mode=0o777, exist_ok=True)
+        cls.validated.add(path)
+        return path
+
+    @classmethod
+    def get(cls, *folders):
+        if not cls.root:
+            cls.resolve()
+        return cls.validate(os.path.join(cls.root, *folders))
+
+    @classmethod
+    def invalidate(cls):
+        cls.validated = set()
+
+
+def get_config_path(*folders):
+    return Config_Paths.get(*folders)
 
 
 def is_native_template_path(template_name):
@@ -197,44 +294,213 @@ def get_template_path(return_type=False):
         if return_type:
             return 'NATIVE', is_native
         return is_native
-    config_templates_path = os.path.join(get_config_path(), "templates")
+    config_templates_path = get_config_path("templates")
     config_file_path = os.path.join(config_templates_path, props().templates + ".json")
     if return_type:
         return 'CONFIG', config_file_path
     return config_file_path
 
 
-def make_enum_from_file_list(path, start_index, extension='.json', skip_name_list=[]):
-    enum = []
-    i = start_index
-    for file in os.listdir(path):
-        if os.path.isfile(os.path.join(path, file)) and\
-                file.lower().endswith(extension):
-            name = file.split(extension)[0]
-            if name in skip_name_list:
-                continue
-            enum.append((name, name, '', i))
-            i += 1
-    return enum
+def is_native_template(template_name):
+    if Template_Library.is_open():
+        return Template_Library.get_template_location(template_name) == 'NATIVE'
+    return bool(is_native_template_path(template_name))
+
+
+def get_template_file_path(template):
+    template_path = is_native_template_path(template)
+    if template_path:
+        return template_path
+    return os.path.join(get_config_path("templates"), template + ".json")
+
+
+class Template_State:
+    version = 0
+    template = None
+    signature = None
+    template_data = None
+
+    @classmethod
+    def source_signature(cls, template):
+        if Template_Library.is_open():
+            return 'LIBRARY', Template_Library.version
+        json_file_path = get_template_file_path(template)
+        signature = file_signature(json_file_path)
+        if signature is None:
+            pack_path = get_pack_path(template)
+            return pack_path, file_signature(pack_path)
+        return json_file_path, signature, id(Json_Saver.get_pending(json_file_path))
+
+    @classmethod
+    def get(cls, template=None):
+        if template is None:
+            template = props().templates
+        signature = cls.source_signature(template)
+        if template != cls.template or signature != cls.signature:
+            cls.template_data = get_template_data(template)
+            cls.template = template
+            cls.signature = signature
+            cls.version += 1
+        return cls.template_data
+
+    @classmethod
+    def is_available(cls):
+        # the compact categories are enough to draw the panel
+        if get_compact_template():
+            return True
+        return cls.get() is not None
+
+    @classmethod
+    def get_category(cls, category):
+        compact_template = get_compact_template()
+        if compact_template:
+            return compact_template.category(category)
+        template_data = cls.get()
+        if not template_data:
+            return None
+        return template_data.get(category)
+
+    @classmethod
+    def invalidate(cls):
+        cls.template = None
+        cls.signature = None
+        cls.template_data = None
+
+
+def get_template_data(template=None, mutable=False):
+    if template is None:
+        if not mutable:
+            return Template_State.get()
+        template = props().templates
+    if Template_Library.is_open():
+        template_data = Template_Library.get_template(template)
+        if mutable:
+            return thaw_json_data(template_data)
+        return template_data
+    template_data = get_json_data(get_template_file_path(template), mutable=mutable)
+    if template_data is None:
+        template_data = get_pack_data(template)
+        if mutable:
+            return thaw_json_data(template_data)
+    return template_data
+
+
+def get_pack_path(template):
+    return os.path.join(get_config_path("packs"), template + pack.EXTENSION)
+
+
+def get_pack_data(template, mapping=None):
+    pack_path = get_pack_path(template)
+    try:
+        if mapping is None:
+            return Mapping_Pack.get_template(pack_path)
+        return Mapping_Pack.get_mapping(pack_path, mapping)
+    except (OSError, ValueError, zipfile.BadZipFile):
+        return None
+
+
+def get_compact_template(template=None):
+    if Template_Library.is_open() or not props().prefs.use_compact_format:
+        return None
+    if template is None:
+        template = props().templates
+    json_file_path = get_template_file_path(template)
+    json_signature = file_signature(json_file_path)
+    if json_signature is None or Json_Saver.get_pending(json_file_path) is not None:
+        return None
+    compact_file_path = compact_template_path(json_file_path)
+    try:
+        compact_template = Compact_Template.load(compact_file_path)
+    except (OSError, ValueError, struct.error):
+        compact_template = None
+    if compact_template is not None and compact_template.source_signature == json_signature:
+        return compact_template
+    template_data = get_json_data(json_file_path)
+    if template_data is None:
+        return None
+    return Compact_Template.write(compact_file_path, template_data, json_signature)
+
+
+def get_template_categories(template=None):
+    compact_template = get_compact_template(template)
+    if compact_template:
+        return compact_template.categories()
+    template_data = get_template_data(template)
+    if not template_data:
+        return []
+    return list(template_data)
+
+
+def get_template_category(category, template=None):
+    if template is None:
+        return Template_State.get_category(category)
+    compact_template = get_compact_template(template)
+    if compact_template:
+        return compact_template.category(category)
+    template_data = get_template_data(template)
+    if not template_data:
+        return None
+    return template_data.get(category)
+
+
+def save_template_data(template, template_data, location='CONFIG'):
+    if Template_Library.is_open():
+        Template_Library.save_template(template, template_data, location)
+        return None
+    if location == 'NATIVE':
+        module_path = os.path.dirname(__file__)
+        templates_path = os.path.join(module_path, "templates")
+    else:
+        templates_path = get_config_path("templates")
+    save_json_data(os.path.join(templates_path, template + ".json"), template_data)
+
+
+def get_library_path():
+    return os.path.join(get_config_path(), Template_Library.file_name)
+
+
+def import_template_library(overwrite=False):
+    module_path = os.path.dirname(__file__)
+    return Template_Library.import_folders([
+        (
+            'NATIVE',
+            os.path.join(module_path, "templates"),
+            os.path.join(module_path, "bone_mapping")
+        ),
+        ('CONFIG', get_config_path("templates"), get_config_path("bone_mapping")),
+    ], overwrite=overwrite)
+
+
+def open_template_library():
+    library_path = get_library_path()
+    is_new = not os.path.isfile(library_path)
+    Template_Library.open(library_path)
+    if is_new:
+        import_template_library()
+
+
+def update_use_library(self, context):
+    if self.use_library:
+        open_template_library()
+    else:
+        Template_Library.close()
+    if props(context).initialize:
+        initiate_search_props()
 
 
 def template_list_enum(self, context):
+    if Template_Library.is_open():
+        return Template_Library.enum_items()
     module_path = os.path.dirname(__file__)
     native_path = os.path.join(module_path, "templates")
-    validate_path(native_path)
-    native = make_enum_from_file_list(native_path, 0)
-    config_path = os.path.join(get_config_path(), "templates")
-    validate_path(config_path)
-    config = make_enum_from_file_list(config_path, len(native))
-    return native + config
+    config_path = get_config_path("templates")
+    packs_path = (get_config_path("packs"), pack.EXTENSION)
+    return Directory_Index.enum_items((native_path, config_path, packs_path))
 
 
 def bone_category_enum(self, context):
-    json_file_path = get_template_path()
-    if not os.path.isfile(json_file_path):
-        return []
-    file_data = get_json_data(json_file_path)
-    return [(cat, cat, '', i) for i, cat in enumerate(file_data)]
+    categories = get_template_categories()
+    return [(cat, cat, '', i) for i, cat in enumerate(categories)]
 
 
 def scene_armatures_enum(self, context):
@@ -254,11 +520,7 @@ def get_native_mapping_path(template):
 
 
 def get_config_mapping_path(template):
-    config_path = os.path.join(get_config_path(), "bone_mapping")
-    validate_path(config_path)
-    config_mapping_path = os.path.join(config_path, template)
-    validate_path(config_mapping_path)
-    return config_mapping_path
+    return get_config_path("bone_mapping", template)
 
 
 def get_mapping_path(template, location='CONFIG'):
@@ -273,6 +535,11 @@ def save_custom_file(template_name, template_data, location='CONFIG'):
     custom_mapping_data = {}
     for category, i, name in iterate_template_data(template_data):
         custom_mapping_data[name] = ""
+    if Template_Library.is_open():
+        Template_Library.save_mapping(
+            template_name, 'custom', custom_mapping_data, location
+        )
+        return None
     mapping_path = get_mapping_path(template_name, location)
     validate_path(mapping_path)
     json_file_path = os.path.join(mapping_path, 'custom.json')
@@ -280,18 +547,19 @@ def save_custom_file(template_name, template_data, location='CONFIG'):
 
 
 def create_bone_mapping_enum(context, skip_name_list=[]):
-    native_mapping_path = get_native_mapping_path(props(context).templates)
-    if os.path.isdir(native_mapping_path):
-        native = make_enum_from_file_list(
-            native_mapping_path, 0, skip_name_list=skip_name_list
-        )
-    else:
-        native = []
-    config_mapping_path = get_config_mapping_path(props(context).templates)
-    config = make_enum_from_file_list(
-        config_mapping_path, len(native), skip_name_list=skip_name_list
+    return create_bone_mapping_enum_items(props(context).templates, skip_name_list)
+
+
+def create_bone_mapping_enum_items(template, skip_name_list=[]):
+    if Template_Library.is_open():
+        return Template_Library.enum_items(template, skip_name_list)
+    native_mapping_path = get_native_mapping_path(template)
+    config_mapping_path = get_config_mapping_path(template)
+    items = Directory_Index.enum_items(
+        (native_mapping_path, config_mapping_path),
+        skip_name_list=skip_name_list
     )
-    return native + config
+    return Mapping_Pack.enum_items(get_pack_path(template), items, skip_name_list)
 
 
 def bone_mapping_to_overwrite_enum(self, context):
@@ -314,20 +582,133 @@ def iterate_wm_search_props(context):
         yield prop.name, prop
 
 
+class Search_Props_Index:
+    # bone name: indices of the search props with this name
+    names = dict([])
+    count = 0
+    # increased every time the search props are filled from a template
+    generation = 0
+
+    @classmethod
+    def reset(cls, search_props):
+        cls.generation += 1
+        cls.build(search_props)
+
+    @classmethod
+    def build(cls, search_props):
+        names = dict([])
+        for i, prop in enumerate(search_props):
+            names.setdefault(prop.name, []).append(i)
+        cls.names = {name: tuple(indices) for name, indices in names.items()}
+        cls.count = len(search_props)
+
+    @classmethod
+    def is_valid(cls, search_props, name, indices):
+        if len(search_props) != cls.count:
+            return False
+        return search_props[indices[0]].name == name
+
+    @classmethod
+    def invalidate(cls):
+        cls.names = dict([])
+        cls.count = 0
+        cls.generation += 1
+
+    @classmethod
+    def is_current(cls, search_props):
+        # one stored entry is checked, a replaced collection of the same
+        # length holds other names
+        for name, indices in cls.names.items():
+            return cls.is_valid(search_props, name, indices)
+        return len(search_props) == cls.count
+
+    @classmethod
+    def indices(cls, context, name):
+        search_props = context.window_manager.at_search_list_props
+        indices = cls.names.get(name)
+        if indices is None and cls.is_current(search_props):
+            return ()
+        if indices is None or not cls.is_valid(search_props, name, indices):
+            cls.build(search_props)
+            indices = cls.names.get(name, ())
+        return indices
+
+    @classmethod
+    def get(cls, context, name):
+        indices = cls.indices(context, name)
+        if not indices:
+            return None
+        return context.window_manager.at_search_list_props[indices[0]]
+
+    @classmethod
+    def iterate(cls, context, name):
+        search_props = context.window_manager.at_search_list_props
+        for i in cls.indices(context, name):
+            yield search_props[i]
+
+
 def apply_bone_mapping_data(context, mapping_data):
-    for name, prop in iterate_wm_search_props(context):
-        if mapping_data.get(name) is not None:
-            prop.bone = mapping_data.get(name)
+    with Bulk_Mapping_Update(context):
+        for name, bone in mapping_data.items():
+            if bone is None:
+                continue
+            for prop in Search_Props_Index.iterate(context, name):
+                prop.bone = bone
 
 
-def update_apply_bone_mapping(self, context):
-    native_mapping_path = get_native_mapping_path(props(context).templates)
-    config_mapping_path = get_config_mapping_path(props(context).templates)
-    filename = self.bone_mapping + '.json'
-    filepath = os.path.join(native_mapping_path, filename)
+def get_bone_mapping_data(template, mapping):
+    if Template_Library.is_open():
+        return Template_Library.get_mapping(template, mapping)
+    filename = mapping + '.json'
+    filepath = os.path.join(get_native_mapping_path(template), filename)
     if not os.path.isfile(filepath):
-        filepath = os.path.join(config_mapping_path, filename)
-    file_data = get_json_data(filepath)
+        filepath = os.path.join(get_config_mapping_path(template), filename)
+    mapping_data = get_json_data(filepath)
+    if mapping_data is None:
+        return get_pack_data(template, mapping)
+    return mapping_data
+
+
+def get_template_mappings(template):
+    mappings = {}
+    for item in create_bone_mapping_enum_items(template):
+        mapping_data = get_bone_mapping_data(template, item[0])
+        if mapping_data is not None:
+            mappings[item[0]] = mapping_data
+    return mappings
+
+
+def apply_bone_mapping_file(context, file_path, swap_links=False):
+    wm = context.window_manager
+    search_props = wm.at_search_list_props
+    Search_Props_Index.build(search_props)
+    stream = Json_Stream(file_path)
+    applied = 0
+    wm.progress_begin(0, 100)
+    try:
+        with Bulk_Mapping_Update(context):
+            for name, bone in stream.iterate(filter_key=Search_Props_Index.names.__contains__):
+                if stream.is_array:
+                    # ue2rigify links: [{"from_socket": ..., "to_socket": ...}, ...]
+                    if swap_links:
+                        name, bone = bone.get('to_socket'), bone.get('from_socket')
+                    else:
+                        name, bone = bone.get('from_socket'), bone.get('to_socket')
+                if bone is None:
+                    continue
+                for prop in Search_Props_Index.iterate(context, name):
+                    prop.bone = bone
+                    applied += 1
+                wm.progress_update(int(stream.progress * 100))
+    finally:
+        wm.progress_end()
+    return applied
+
+
+def update_apply_bone_mapping(self, context):
+    file_data = get_bone_mapping_data(props(context).templates, self.bone_mapping)
+    if file_data is None:
+        return None
     apply_bone_mapping_data(context, file_data)
     obj = context.active_object
     settings = obj.data.armtemp_settings
@@ -342,15 +723,179 @@ def set_search_props(class_type, template_data):
         prop = search_props.add()
         prop.name = name
         prop.category = category
+    Search_Props_Index.reset(search_props)
+    Mapping_Coverage.invalidate()
 
 
 def initiate_search_props():
-    json_file_path = get_template_path()
-    template_data = get_json_data(json_file_path)
+    # the compact template is read category by category instead of
+    # decoding the .json file
+    template_data = get_compact_template() or get_template_data()
     from .properties import Search_Bones
     set_search_props(Search_Bones, template_data)
 
 
+class Mapping_Data_Cache:
+    # armature data pointer: (text key, decoded mapping data)
+    decoded = dict([])
+    # armature data pointer: search props generation the mapping was built from
+    generations = dict([])
+
+    @classmethod
+    def text_key(cls, text):
+        return len(text), hash(text)
+
+    @classmethod
+    def decode(cls, armature):
+        text = armature.armtemp_settings.mapping_data
+        key = cls.text_key(text)
+        cached = cls.decoded.get(armature.as_pointer())
+        if cached and cached[0] == key:
+            return cached[1]
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+        data = MappingProxyType(data)
+        cls.decoded[armature.as_pointer()] = (key, data)
+        return data
+
+    @classmethod
+    def encode(cls, armature, data, generation):
+        text = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        armature.armtemp_settings.mapping_data = text
+        cls.decoded[armature.as_pointer()] = (cls.text_key(text), MappingProxyType(data))
+        cls.generations[armature.as_pointer()] = generation
+
+    @classmethod
+    def invalidate(cls):
+        cls.decoded.clear()
+        cls.generations.clear()
+
+    @classmethod
+    def update_entry(cls, armature, name, bone, count, generation):
+        # rewrites a single entry of the cached mapping instead of collecting
+        # every search prop again, returns False if the cache is out of sync
+        if cls.generations.get(armature.as_pointer()) != generation:
+            return False
+        data = cls.decode(armature)
+        if name not in data or len(data) != count:
+            return False
+        if data[name] == bone:
+            return True
+        data = dict(data)
+        data[name] = bone
+        cls.encode(armature, data, generation)
+        return True
+
+
+class Mapping_Coverage:
+    states_list = ('MAPPED', 'UNMAPPED', 'BROKEN')
+    # (category, source name): state of the mapped target bone
+    states = dict([])
+    # category: {state: count}
+    counts = dict([])
+    signature = None
+
+    @staticmethod
+    def get_state(bones, bone):
+        if not bone:
+            return 'UNMAPPED'
+        if bones.get(bone) is None:
+            return 'BROKEN'
+        return 'MAPPED'
+
+    @staticmethod
+    def get_signature(context):
+        obj = context.active_object
+        if obj is None or obj.type != 'ARMATURE':
+            return None
+        search_props = context.window_manager.at_search_list_props
+        # a renamed bone gives the armature a new bone index generation
+        return (
+            obj.data.as_pointer(), Bone_Index.get(obj.data).generation, len(search_props)
+        )
+
+    @classmethod
+    def new_counts(cls):
+        return dict.fromkeys(cls.states_list, 0)
+
+    @classmethod
+    def build(cls, context):
+        cls.states = dict([])
+        cls.counts = dict([])
+        cls.signature = cls.get_signature(context)
+        if cls.signature is None:
+            return None
+        bones = context.active_object.data.bones
+        for prop in context.window_manager.at_search_list_props:
+            cls.states[(prop.category, prop.name)] = cls.get_state(bones, prop.bone)
+        for (category, name), state in cls.states.items():
+            cls.counts.setdefault(category, cls.new_counts())[state] += 1
+
+    @classmethod
+    def update(cls, context, prop):
+        # applies the state change of a single search prop to the counters
+        if cls.get_signature(context) != cls.signature:
+            cls.build(context)
+            return None
+        key = (prop.category, prop.name)
+        state = cls.get_state(context.active_object.data.bones, prop.bone)
+        old_state = cls.states.get(key)
+        if old_state == state:
+            return None
+        counts = cls.counts.setdefault(prop.category, cls.new_counts())
+        if old_state is not None:
+            counts[old_state] -= 1
+        counts[state] += 1
+        cls.states[key] = state
+
+    @classmethod
+    def get(cls, context, category=None):
+        if cls.get_signature(context) != cls.signature:
+            cls.build(context)
+        if category is not None:
+            return cls.counts.get(category, cls.new_counts())
+        total = cls.new_counts()
+        for counts in cls.counts.values():
+            for state in cls.states_list:
+                total[state] += counts[state]
+        return total
+
+    @classmethod
+    def invalidate(cls):
+        cls.signature = None
+
+
+class Bulk_Mapping_Update:
+    # suppresses the per-entry update_mapping_list calls while a whole mapping
+    # is applied and stores the mapping data once on exit
+    depth = 0
+    changed = False
+
+    def __init__(self, context):
+        self.context = context
+
+    def __enter__(self):
+        Bulk_Mapping_Update.depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        cls = Bulk_Mapping_Update
+        cls.depth -= 1
+        if cls.depth or not cls.changed:
+            return None
+        cls.changed = False
+        if props().ui_switching:
+            return None
+        obj = self.context.active_object
+        Mapping_Data_Cache.encode(
+            obj.data, get_mapped_bones_data(self.context), Search_Props_Index.generation
+        )
+
+
 def ui_switch_select(cls):
     obj = bpy.context.active_object
     if cls.armature != obj.name:
@@ -368,14 +913,13 @@ def ui_switch_select(cls):
             except TypeError:
                 pass
         if settings.bone_list:
-            bools = [bool(int(b)) for b in settings.bone_list.split(' ')]
-            set_select_bone_layers(bools)
+            set_select_bone_layers(decode_bone_list(settings.bone_list))
         else:
             layer_bools = [layer for layer in obj.data.layers]
+            layer_bools[0] = layer_bools[29] = True
             set_select_bone_layers(layer_bools)
-            set_bone_list_layer([0, 29])
         if settings.mapping_data:
-            apply_bone_mapping_data(bpy.context, eval(settings.mapping_data))
+            apply_bone_mapping_data(bpy.context, Mapping_Data_Cache.decode(obj.data))
             redraw_area('PROPERTIES')
         props().ui_switching = False
 
@@ -394,23 +938,33 @@ def update_templates(self, context):
 def update_armature_layers(self, context):
     obj = context.active_object
     settings = obj.data.armtemp_settings
-    index_list = get_selected_bone_layers(context)
-    bools = [(i in index_list) for i in range(32)]
-    settings.bone_list = " ".join([str(int(b)) for b in bools])
+    settings.bone_list = encode_bone_list(self.armature_layers)
 
 
 def update_mapping_list(self, context):
+    Mapping_Coverage.update(context, self)
     if props().ui_switching:
         return None
+    if Bulk_Mapping_Update.depth:
+        Bulk_Mapping_Update.changed = True
+        return None
     obj = context.active_object
-    settings = obj.data.armtemp_settings
-    data = get_mapped_bones_data(context)
-    settings.mapping_data = json.dumps(data)
+    search_props = context.window_manager.at_search_list_props
+    if len(search_props) != Search_Props_Index.count:
+        Search_Props_Index.build(search_props)
+    if Mapping_Data_Cache.update_entry(
+        obj.data, self.name, self.bone,
+        len(Search_Props_Index.names), Search_Props_Index.generation
+    ):
+        return None
+    Mapping_Data_Cache.encode(
+        obj.data, get_mapped_bones_data(context), Search_Props_Index.generation
+    )
 
 
 def update_browse_path(self, context):
     if self.browse_path == 'CONFIG':
-        path = os.path.join(get_config_path(), "bone_mapping")
+        path = get_config_path("bone_mapping")
     elif self.browse_path == 'NATIVE':
         module_path = os.path.dirname(__file__)
         path = os.path.join(module_path, "bone_mapping")
@@ -422,26 +976,20 @@ def update_browse_path(self, context):
 
 
 def get_selected_bone_layers(context):
-    index_list = []
-    for i in range(32):
-        layer_index = getattr(props(context), "armature_layer_" + str(i))
-        if layer_index:
-            index_list.append(i)
-    return index_list
+    return [i for i, b in enumerate(props(context).armature_layers) if b]
 
 
 def set_select_bone_layers(bools):
-    for i in range(32):
-        setattr(props(), "armature_layer_" + str(i), bools[i])
+    props().armature_layers = bools
 
 
 def get_bones_in_selected_layers(context, obj):
     if obj is None:
         obj = context.active_object
-    layer_bones = []
-    for i in get_selected_bone_layers(context):
-        layer_bones += get_layer_bones(context, i, obj)
-    return layer_bones
+    if obj.type != 'ARMATURE':
+        return []
+    index_list = get_selected_bone_layers(context)
+    return get_pose_bones_by_index(obj, Layer_Bones_Index.get(obj, index_list))
 
 
 def get_mapped_bones_data(context):
@@ -497,10 +1045,44 @@ def set_template_category_list(name_list, flag_list=None, clear=True):
         item.flag = False
 
 
+class Redraw_Scheduler:
+    area_types = set()
+    requests = 0
+    coalesced = 0
+    flushes = 0
+
+    @classmethod
+    def request(cls, area_type):
+        cls.requests += 1
+        if area_type in cls.area_types:
+            cls.coalesced += 1
+        cls.area_types.add(area_type)
+        if bpy.app.timers.is_registered(flush_redraw_requests):
+            return None
+        bpy.app.timers.register(flush_redraw_requests, first_interval=0, persistent=True)
+
+    @classmethod
+    def stats(cls):
+        return {
+            'requests': cls.requests,
+            'coalesced': cls.coalesced,
+            'flushes': cls.flushes,
+        }
+
+
+def flush_redraw_requests():
+    area_types = Redraw_Scheduler.area_types
+    Redraw_Scheduler.area_types = set()
+    Redraw_Scheduler.flushes += 1
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type in area_types:
+                area.tag_redraw()
+    return None
+
+
 def redraw_area(area_type):
-    for area in bpy.context.screen.areas:
-        if area.type == area_type:
-            area.tag_redraw()
+    Redraw_Scheduler.request(area_type)
 
 
 def check_new_bone(edit_bones, bone, to_bone, new_bones_data):
@@ -550,9 +1132,7 @@ def iterate_template_links(context, side):
 
 
 def iterate_template_category_links(context, side=None):
-    json_file_path = get_template_path()
-    file_data = get_json_data(json_file_path)
-    category_list = file_data.get(props(context).bone_category)
+    category_list = get_template_category(props(context).bone_category)
     if not category_list:
         return []
     mapping_data = get_mapped_bones_data(context)
@@ -567,17 +1147,23 @@ def iterate_template_category_links(context, side=None):
 
 def get_bones_by_name(obj, startswith, bone_type=None, break_name=None):
     if bone_type == 'edit':
+        # edit bones are not indexed, they change until edit mode is left
         bones = obj.data.edit_bones
+        bones.update()
+        names = [bone.name for bone in bones]
     else:
         bones = obj.pose.bones
-    bones.update()
+        bones.update()
+        names = Bone_Index.get(obj.data).names
     bone_list = []
-    for bone in bones:
-        if not bone.name.startswith(startswith):
+    for name in names:
+        if not name.startswith(startswith):
             continue
-        if bone.name == break_name:
+        if name == break_name:
             break
-        bone_list.append(bone)
+        bone = bones.get(name)
+        if bone:
+            bone_list.append(bone)
     return bone_list
 
 
@@ -923,15 +1509,253 @@ def create_twist_bones(
     bpy.ops.armature.select_all(action='DESELECT')
 
 
+class Bone_Data_Search_List:
+    signature = None
+    count = 0
+
+
+def get_bone_layers_array(obj):
+    bones = obj.data.bones
+    layers = np.zeros(len(bones) * 32, dtype=bool)
+    bones.foreach_get('layers', layers)
+    return layers.reshape(-1, 32)
+
+
+class Layer_Bones_Index:
+    # armature data pointer: (bone layers bytes, {selected layers: bone indices})
+    armatures = dict([])
+
+    @classmethod
+    def get(cls, obj, layer_index_list):
+        layers = get_bone_layers_array(obj)
+        key = obj.data.as_pointer()
+        layers_key = layers.tobytes()
+        cached = cls.armatures.get(key)
+        if cached is None or cached[0] != layers_key:
+            cached = (layers_key, dict([]))
+            cls.armatures[key] = cached
+        selected = tuple(sorted(set(layer_index_list)))
+        indices = cached[1].get(selected)
+        if indices is None:
+            mask = np.zeros(32, dtype=bool)
+            mask[list(selected)] = True
+            indices = tuple(np.flatnonzero((layers & mask).any(axis=1)).tolist())
+            cached[1][selected] = indices
+        return indices
+
+    @classmethod
+    def invalidate(cls, armature=None):
+        if armature is None:
+            cls.armatures.clear()
+            return None
+        cls.armatures.pop(armature.as_pointer(), None)
+
+
+class Bone_Index:
+    # armature data pointer: Bone_Index
+    armatures = dict([])
+    # armature object pointer: last seen object mode
+    modes = dict([])
+    # increased for every built index
+    generations = 0
+
+    def __init__(self, armature):
+        Bone_Index.generations += 1
+        self.generation = Bone_Index.generations
+        bones = armature.bones
+        self.count = len(bones)
+        self.names = tuple(b.name for b in bones)
+        self.indices = {name: i for i, name in enumerate(self.names)}
+        self.parents = tuple(
+            self.indices[b.parent.name] if b.parent else -1 for b in bones
+        )
+        children = [[] for name in self.names]
+        for i, parent in enumerate(self.parents):
+            if parent != -1:
+                children[parent].append(i)
+        self.children = tuple(tuple(c) for c in children)
+        self.lower_names = tuple(name.lower() for name in self.names)
+        self.tokens = tuple(tuple(split_name(name)) for name in self.lower_names)
+
+    @classmethod
+    def get(cls, armature):
+        index = cls.armatures.get(armature.as_pointer())
+        if index is None or index.count != len(armature.bones):
+            index = cls.rebuild(armature)
+        return index
+
+    @classmethod
+    def rebuild(cls, armature):
+        index = cls(armature)
+        cls.armatures[armature.as_pointer()] = index
+        return index
+
+    @classmethod
+    def get_names(cls, armature, indices):
+        # the handlers invalidate the index, only the returned names are
+        # checked for a rename made since then
+        index = cls.get(armature)
+        names = [index.names[i] for i in indices]
+        bones = armature.bones
+        if any(bones.get(name) is None for name in names):
+            index = cls.rebuild(armature)
+            names = [index.names[i] for i in indices]
+        return names
+
+    @classmethod
+    def get_tokens(cls, armature, names):
+        # lowered name parts, a name missing from the index is split again
+        index = cls.get(armature)
+        tokens = []
+        for name in names:
+            i = index.indices.get(name)
+            if i is None:
+                tokens.append(tuple(split_name(name.lower())))
+            else:
+                tokens.append(index.tokens[i])
+        return tokens
+
+    @classmethod
+    def find_bone(cls, armature, name):
+        i = cls.get(armature).indices.get(name)
+        if i is None:
+            # a bone renamed since the index was built
+            return armature.bones.get(name)
+        bone = armature.bones[i]
+        if bone.name != name:
+            cls.invalidate(armature)
+            return armature.bones.get(name)
+        return bone
+
+    @classmethod
+    def find_bones(cls, armature, names):
+        bones = []
+        for name in names:
+            bone = cls.find_bone(armature, name)
+            if bone is not None:
+                bones.append(bone)
+        return bones
+
+    @classmethod
+    def invalidate(cls, armature=None):
+        if armature is None:
+            cls.armatures.clear()
+            cls.modes.clear()
+            return None
+        cls.armatures.pop(armature.as_pointer(), None)
+
+    @classmethod
+    def check_mode(cls, obj):
+        key = obj.as_pointer()
+        if cls.modes.get(key) == 'EDIT' and obj.mode != 'EDIT':
+            cls.invalidate(obj.data)
+        cls.modes[key] = obj.mode
+
+
+@persistent
+def clear_bone_index(*args):
+    Bone_Index.invalidate()
+    Layer_Bones_Index.invalidate()
+
+
+@persistent
+def clear_mapping_caches(*args):
+    Search_Props_Index.invalidate()
+    Mapping_Data_Cache.invalidate()
+
+
+@persistent
+def update_bone_index(scene, depsgraph):
+    for update in depsgraph.updates:
+        id_data = update.id.original
+        if isinstance(id_data, bpy.types.Armature):
+            Bone_Index.invalidate(id_data)
+        elif isinstance(id_data, bpy.types.Object) and id_data.type == 'ARMATURE':
+            Bone_Index.check_mode(id_data)
+
+
+def get_bone_depths(armature):
+    parents = Bone_Index.get(armature).parents
+    depths = [-1] * len(parents)
+    for i in range(len(parents)):
+        chain = []
+        j = i
+        while j != -1 and depths[j] == -1:
+            chain.append(j)
+            j = parents[j]
+        depth = depths[j] + 1 if j != -1 else 0
+        for k in reversed(chain):
+            depths[k] = depth
+            depth += 1
+    return depths
+
+
+def get_spatial_bones(obj, bones):
+    # rest pose heads and tails in world space, moved to the floor center
+    # and scaled to the height of the bones, with the hierarchy depth and side
+    if not bones:
+        return []
+    matrix = obj.matrix_world
+    heads = [matrix @ b.head_local for b in bones]
+    tails = [matrix @ b.tail_local for b in bones]
+    points = heads + tails
+    low = [min(co[axis] for co in points) for axis in range(3)]
+    high = [max(co[axis] for co in points) for axis in range(3)]
+    height = (high[2] - low[2]) or 1.0
+    origin = Vector(((low[0] + high[0]) / 2, (low[1] + high[1]) / 2, low[2]))
+    depths = get_bone_depths(obj.data)
+    indices = Bone_Index.get(obj.data).indices
+    spatial_bones = []
+    for b, head, tail in zip(bones, heads, tails):
+        head = (head - origin) / height
+        tail = (tail - origin) / height
+        center = (head.x + tail.x) / 2
+        side = 0 if abs(center) < 0.01 else (1 if center > 0 else -1)
+        depth = depths[indices[b.name]] if b.name in indices else 0
+        spatial_bones.append((b.name, head, tail, depth, side))
+    return spatial_bones
+
+
+def get_pose_bones_by_index(obj, indices):
+    # bone indices are resolved by name, pose bones may be ordered differently
+    pose_bones = obj.pose.bones
+    layer_bones = []
+    for name in Bone_Index.get_names(obj.data, indices):
+        pose_bone = pose_bones.get(name)
+        if pose_bone is not None:
+            layer_bones.append(pose_bone)
+    return layer_bones
+
+
+def get_bone_list_signature(obj, layer_index_list):
+    if obj is None or obj.type != 'ARMATURE':
+        return None
+    bones = obj.data.bones
+    return (
+        obj.data.as_pointer(),
+        len(bones),
+        hash(tuple(b.name for b in bones)),
+        hash(get_bone_layers_array(obj).tobytes()),
+        tuple(layer_index_list),
+    )
+
+
 def load_bone_data_search_list(context, layer_index_list):
     bone_data_list = context.window_manager.at_bone_data_search_list
+    signature = get_bone_list_signature(context.active_object, layer_index_list)
+    if signature == Bone_Data_Search_List.signature and\
+            len(bone_data_list) == Bone_Data_Search_List.count:
+        return None
     bone_data_list.clear()
+    obj = context.active_object
     bones = []
-    for i in layer_index_list:
-        bones += get_layer_bones(context, i, None)
+    if obj is not None and obj.type == 'ARMATURE':
+        bones = get_pose_bones_by_index(obj, Layer_Bones_Index.get(obj, layer_index_list))
     for b in bones:
         item = bone_data_list.add()
         item.name = b.name
+    Bone_Data_Search_List.signature = signature
+    Bone_Data_Search_List.count = len(bone_data_list)
 
 
 def set_active_collection(name):
@@ -1262,16 +2086,9 @@ def scale_armature(context, obj, scale_value, empty_name):
 
 
 def get_file_list_names(path, full_name=False, extension='.json'):
-    file_names = []
-    for file in os.listdir(path):
-        if os.path.isfile(os.path.join(path, file)) and\
-                file.lower().endswith(extension):
-            if full_name:
-                file_names.append(file)
-                continue
-            name = file.split(extension)[0]
-            file_names.append(name)
-    return file_names
+    return Directory_Index.list_names(
+        path, extension=extension, full_name=full_name
+    )
 
 
 def get_module_from_path(file_path, name):
@@ -1305,3 +2122,52 @@ def ue2rigify_links_enum(self, context):
     template_path = os.path.join(path, template)
     files = get_file_list_names(template_path, extension="_links.json")
     return [(os.path.join(template_path, n + "_links.json"), n, '') for n in files]
+
+
+def preload_template_data():
+    addon = bpy.context.preferences.addons.get(__package__)
+    if addon and not addon.preferences.use_preload:
+        return None
+    module_path = os.path.dirname(__file__)
+    Json_Preloader.start(
+        (os.path.join(module_path, "templates"), get_config_path("templates")),
+        (os.path.join(module_path, "bone_mapping"), get_config_path("bone_mapping")),
+        library=Template_Library
+    )
+    return None
+
+
+def register():
+    Config_Paths.resolve()
+    bpy.app.timers.register(
+        preload_template_data, first_interval=0.5, persistent=True
+    )
+    bpy.app.handlers.depsgraph_update_post.append(update_bone_index)
+    bpy.app.handlers.load_post.append(clear_bone_index)
+    bpy.app.handlers.load_post.append(clear_mapping_caches)
+    bpy.app.handlers.undo_post.append(clear_bone_index)
+    bpy.app.handlers.redo_post.append(clear_bone_index)
+
+
+def unregister():
+    for timer in (preload_template_data, flush_redraw_requests, check_save_errors):
+        if bpy.app.timers.is_registered(timer):
+            bpy.app.timers.unregister(timer)
+    Redraw_Scheduler.area_types = set()
+    # the pending saves are written before the add-on is removed
+    Json_Saver.flush()
+    Template_Library.close()
+    Layer_Bones_Index.invalidate()
+    if update_bone_index in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(update_bone_index)
+    for handlers in (
+        bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post
+    ):
+        if clear_bone_index in handlers:
+            handlers.remove(clear_bone_index)
+    if clear_mapping_caches in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(clear_mapping_caches)
+    clear_mapping_caches()
+    Bone_Index.invalidate()
+    Config_Paths.root = ''
+    Config_Paths.invalidate()
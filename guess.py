@@ -0,0 +1,400 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Guess Mapping scoring: every part of the searched name that is found in the
+# source name counts as a match, a side part (l/r) has to be a separate part of
+# the source name and a numeric part also matches the same number ("1" - "01").
+# A part can only be found inside a single part of the lowered source name, so
+# source names are indexed by their parts and only the names that share a part
+# with the searched name are scored.
+
+import re
+import numpy as np
+from mathutils.kdtree import KDTree
+
+PARTS = re.compile(r'\d+|[A-Za-z]+')
+SIDES = ('l', 'r')
+
+
+def split_name(name):
+    return PARTS.findall(name)
+
+
+def is_irrelevant_part(part):
+    return part.lower() in SIDES or part.isnumeric()
+
+
+def get_name_tokens(names, tokens=None):
+    # lowered parts of every name, tokens can be passed in precomputed
+    if tokens is not None:
+        return tokens
+    return [tuple(split_name(name.lower())) for name in names]
+
+
+class Part_Index:
+    def __init__(self, names, tokens=None):
+        self.names = names
+        # lowered part: indices of the names containing it
+        self.parts = dict([])
+        # number: indices of the names containing it
+        self.numbers = dict([])
+        for i, name_tokens in enumerate(get_name_tokens(names, tokens)):
+            for part in set(name_tokens):
+                self.parts.setdefault(part, []).append(i)
+                if part.isnumeric():
+                    self.numbers.setdefault(int(part), []).append(i)
+        # searched part: indices of the matching names
+        self.matches = dict([])
+
+    def match(self, part):
+        part = part.lower()
+        indices = self.matches.get(part)
+        if indices is not None:
+            return indices
+        if part in SIDES:
+            indices = set(self.parts.get(part, ()))
+        else:
+            indices = set()
+            for source_part, source_indices in self.parts.items():
+                if part in source_part:
+                    indices.update(source_indices)
+            if part.isnumeric():
+                indices.update(self.numbers.get(int(part), ()))
+        indices = frozenset(indices)
+        self.matches[part] = indices
+        return indices
+
+
+class Guess_Engine:
+    # bone_tokens are the lowered parts of the bone names, as kept by the bone index
+    def __init__(self, template_names, bone_names, search_source=False, bone_tokens=None):
+        self.template_names = list(dict.fromkeys(template_names))
+        self.bone_names = list(bone_names)
+        self.bone_tokens = get_name_tokens(self.bone_names, bone_tokens)
+        self.search_source = search_source
+        # template index: {bone index: [match count, relevant match count]}
+        self.scores = [dict([]) for name in self.template_names]
+        if search_source:
+            self.score_bone_parts()
+        else:
+            self.score_template_parts()
+
+    def add_match(self, t, b, part):
+        score = self.scores[t].get(b)
+        if score is None:
+            score = self.scores[t][b] = [0, 0]
+        score[0] += 1
+        if not is_irrelevant_part(part):
+            score[1] += 1
+
+    def score_template_parts(self):
+        bone_index = Part_Index(self.bone_names, self.bone_tokens)
+        for t, name in enumerate(self.template_names):
+            for part in split_name(name):
+                for b in bone_index.match(part):
+                    self.add_match(t, b, part)
+
+    def score_bone_parts(self):
+        template_index = Part_Index(self.template_names)
+        for b, name_tokens in enumerate(self.bone_tokens):
+            for part in name_tokens:
+                for t in template_index.match(part):
+                    self.add_match(t, b, part)
+
+    @staticmethod
+    def is_relevant(score):
+        # one or two matched side or number parts are not enough for a match
+        return score[0] > 2 or score[1] > 0
+
+    def get_match(self, t):
+        biggest_match = 0
+        bone_match = ''
+        scores = self.scores[t]
+        for b in sorted(scores):
+            score = scores[b]
+            if not self.is_relevant(score):
+                continue
+            name = self.bone_names[b]
+            if biggest_match < score[0]:
+                biggest_match = score[0]
+                bone_match = name
+            if biggest_match == score[0] and len(bone_match) > len(name):
+                bone_match = name
+        return bone_match
+
+    def get_mapping_data(self):
+        return {
+            name: self.get_match(t)
+            for t, name in enumerate(self.template_names)
+        }
+
+    def get_score_matrix(self):
+        counts = np.zeros((len(self.template_names), len(self.bone_names)))
+        valid = np.zeros(counts.shape, dtype=bool)
+        for t, scores in enumerate(self.scores):
+            for b, score in scores.items():
+                counts[t, b] = score[0]
+                valid[t, b] = self.is_relevant(score)
+        return counts, valid
+
+
+class Guess_Matrix:
+    # scores all the pairs at once from sparse searched names x parts and
+    # parts x source names index pairs
+    def __init__(self, template_names, bone_names, search_source=False, bone_tokens=None):
+        self.template_names = list(dict.fromkeys(template_names))
+        self.bone_names = list(bone_names)
+        self.search_source = search_source
+        template_tokens = get_name_tokens(self.template_names)
+        bone_tokens = get_name_tokens(self.bone_names, bone_tokens)
+        if search_source:
+            counts, relevant = self.score(bone_tokens, template_tokens)
+            self.counts, self.relevant = counts.T, relevant.T
+        else:
+            self.counts, self.relevant = self.score(template_tokens, bone_tokens)
+
+    @staticmethod
+    def get_part_counts(search_tokens):
+        # sparse searched names x parts counts: (name indices, part ids, counts)
+        parts = list(dict.fromkeys(part for name in search_tokens for part in name))
+        part_ids = {part: i for i, part in enumerate(parts)}
+        keys = np.array([
+            i * len(parts) + part_ids[part]
+            for i, name in enumerate(search_tokens) for part in name
+        ], dtype=np.int64)
+        keys, counts = np.unique(keys, return_counts=True)
+        if not parts:
+            return parts, keys, keys, counts.astype(np.float32)
+        return parts, keys // len(parts), keys % len(parts), counts.astype(np.float32)
+
+    @staticmethod
+    def get_source_pairs(source_tokens):
+        # sparse parts x source names incidence: (part ids, name indices)
+        name_parts = [set(name_tokens) for name_tokens in source_tokens]
+        parts = list(dict.fromkeys(part for name in name_parts for part in name))
+        part_ids = {part: i for i, part in enumerate(parts)}
+        pairs = [(part_ids[part], i) for i, name in enumerate(name_parts) for part in name]
+        pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        return parts, pairs[:, 0], pairs[:, 1]
+
+    @staticmethod
+    def get_containment_pairs(parts, source_parts):
+        # searched parts x source parts containing them: (part ids, source part ids)
+        part_indices = [np.zeros(0, dtype=np.int64)]
+        source_indices = [np.zeros(0, dtype=np.int64)]
+        if not source_parts:
+            return part_indices[0], source_indices[0]
+        source_array = np.array(source_parts, dtype=str)
+        numbers = dict([])
+        for i, part in enumerate(source_parts):
+            if part.isnumeric():
+                numbers.setdefault(int(part), []).append(i)
+        for i, part in enumerate(parts):
+            if part in SIDES:
+                found = np.flatnonzero(source_array == part)
+            else:
+                found = np.flatnonzero(np.char.find(source_array, part) != -1)
+                if part.isnumeric():
+                    found = np.union1d(found, numbers.get(int(part), []))
+            part_indices.append(np.full(len(found), i, dtype=np.int64))
+            source_indices.append(found.astype(np.int64))
+        return np.concatenate(part_indices), np.concatenate(source_indices)
+
+    @staticmethod
+    def join_indices(left, right):
+        # index pairs (i, j) of the equal keys left[i] == right[j]
+        order = np.argsort(right, kind='stable')
+        sorted_right = right[order]
+        start = np.searchsorted(sorted_right, left, side='left')
+        counts = np.searchsorted(sorted_right, left, side='right') - start
+        first = np.cumsum(counts) - counts
+        i = np.repeat(np.arange(len(left)), counts)
+        j = order[np.arange(counts.sum()) + np.repeat(start - first, counts)]
+        return i, j
+
+    @classmethod
+    def score(cls, search_tokens, source_tokens):
+        # the sparse pairs are joined on the part ids, only the result
+        # searched names x source names is dense
+        parts, names, name_parts, part_counts = cls.get_part_counts(search_tokens)
+        source_parts, incidence_parts, incidence_names = cls.get_source_pairs(source_tokens)
+        contained, containing = cls.get_containment_pairs(parts, source_parts)
+        c, s = cls.join_indices(containing, incidence_parts)
+        match_keys = np.unique(contained[c] * len(source_tokens) + incidence_names[s])
+        match_parts = match_keys // max(len(source_tokens), 1)
+        match_names = match_keys % max(len(source_tokens), 1)
+        n, m = cls.join_indices(name_parts, match_parts)
+        relevant_parts = np.array(
+            [not is_irrelevant_part(part) for part in parts], dtype=np.float32
+        )
+        shape = (len(search_tokens), len(source_tokens))
+        counts = np.zeros(shape, dtype=np.float32)
+        relevant = np.zeros(shape, dtype=np.float32)
+        indices = (names[n], match_names[m])
+        np.add.at(counts, indices, part_counts[n])
+        if len(parts):
+            np.add.at(relevant, indices, part_counts[n] * relevant_parts[name_parts[n]])
+        return counts, relevant
+
+    def get_winners(self):
+        # the biggest match count wins, a shorter bone name wins a tie
+        # and the first bone wins a tie of the same length
+        valid = (self.counts > 2) | (self.relevant > 0)
+        scores = np.where(valid, self.counts, 0)
+        best = scores.max(axis=1)
+        candidates = valid & (scores == best[:, None])
+        lengths = np.array([len(name) for name in self.bone_names])
+        lengths = np.where(candidates, lengths[None, :], lengths.max() + 1)
+        return lengths.argmin(axis=1), candidates.any(axis=1)
+
+    def get_score_matrix(self):
+        valid = (self.counts > 2) | (self.relevant > 0)
+        return self.counts.astype(np.float64), valid
+
+    def get_mapping_data(self):
+        if not self.bone_names:
+            return {name: '' for name in self.template_names}
+        winners, found = self.get_winners()
+        return {
+            name: self.bone_names[winners[t]] if found[t] else ''
+            for t, name in enumerate(self.template_names)
+        }
+
+
+class Guess_Spatial:
+    # matches the rest pose positions of the bones normalized by the armature height,
+    # bones are (name, head, tail, depth, side) and side is -1, 0 or 1
+    tolerance = 0.02
+    candidates_count = 8
+
+    def __init__(self, template_bones, bones):
+        self.template_names = [bone[0] for bone in template_bones]
+        self.bone_names = [bone[0] for bone in bones]
+        self.bones = bones
+        tree = KDTree(len(bones) * 2)
+        for i, bone in enumerate(bones):
+            tree.insert(bone[1], i)
+            tree.insert(bone[2], i + len(bones))
+        tree.balance()
+        # template index: bone indices from the best match
+        self.ranks = [
+            self.get_candidates(tree, template_bone) for template_bone in template_bones
+        ]
+
+    def get_candidates(self, tree, template_bone):
+        name, head, tail, depth, side = template_bone
+        count = min(self.candidates_count, len(self.bones) * 2)
+        candidates = set()
+        for co in (head, tail):
+            for found_co, index, distance in tree.find_n(co, count):
+                candidates.add(index % len(self.bones))
+        keys = []
+        for b in candidates:
+            bone = self.bones[b]
+            distance = (head - bone[1]).length + (tail - bone[2]).length
+            # positions closer than the tolerance are decided by side and depth
+            keys.append((
+                int(distance / self.tolerance), side != bone[4],
+                abs(depth - bone[3]), distance, b
+            ))
+        return [key[-1] for key in sorted(keys)]
+
+    def get_mapping_data(self):
+        return {
+            name: self.bone_names[self.ranks[t][0]] if self.ranks[t] else ''
+            for t, name in enumerate(self.template_names)
+        }
+
+    def get_score_matrix(self):
+        # a better rank gets a bigger score
+        counts = np.zeros((len(self.template_names), len(self.bone_names)))
+        valid = np.zeros(counts.shape, dtype=bool)
+        for t, ranks in enumerate(self.ranks):
+            for i, b in enumerate(ranks):
+                counts[t, b] = len(ranks) - i
+                valid[t, b] = True
+        return counts, valid
+
+
+def solve_assignment(cost):
+    # Hungarian method, rows x columns with rows <= columns,
+    # returns the column assigned to each row with the minimal total cost
+    rows, columns = cost.shape
+    u = np.zeros(rows + 1)
+    v = np.zeros(columns + 1)
+    row_of = np.zeros(columns + 1, dtype=int)
+    way = np.zeros(columns + 1, dtype=int)
+    for i in range(1, rows + 1):
+        row_of[0] = i
+        j0 = 0
+        min_values = np.full(columns + 1, np.inf)
+        used = np.zeros(columns + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = row_of[j0]
+            free = ~used[1:]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (reduced < min_values[1:])
+            min_values[1:][better] = reduced[better]
+            way[1:][better] = j0
+            free_values = np.where(free, min_values[1:], np.inf)
+            j1 = int(free_values.argmin()) + 1
+            delta = free_values[j1 - 1]
+            u[row_of[used]] += delta
+            v[used] -= delta
+            min_values[~used] -= delta
+            j0 = j1
+            if row_of[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            row_of[j0] = row_of[j1]
+            j0 = j1
+    assignment = np.zeros(rows, dtype=int)
+    for j in range(1, columns + 1):
+        if row_of[j]:
+            assignment[row_of[j] - 1] = j - 1
+    return assignment
+
+
+def get_unique_mapping_data(engine):
+    # maps every bone to a single template name at most, keeping the biggest
+    # total match count and preferring shorter bone names
+    mapping_data = engine.get_mapping_data()
+    bones = [bone for bone in mapping_data.values() if bone]
+    if len(bones) == len(set(bones)):
+        return mapping_data
+    counts, valid = engine.get_score_matrix()
+    rows = np.flatnonzero(valid.any(axis=1))
+    columns = np.flatnonzero(valid.any(axis=0))
+    lengths = np.array([len(engine.bone_names[b]) for b in columns])
+    # the sum of the length penalties can not outweigh a single match
+    penalty = 1.0 / ((lengths.max() + 1) * (len(rows) + 1))
+    weights = np.where(
+        valid[np.ix_(rows, columns)],
+        counts[np.ix_(rows, columns)] - lengths[None, :] * penalty, 0
+    )
+    # an extra column per row allows to leave the name unmapped
+    cost = np.hstack((-weights, np.zeros((len(rows), len(rows)))))
+    assignment = solve_assignment(cost)
+    mapping_data = dict.fromkeys(mapping_data, '')
+    for i, column in enumerate(assignment):
+        if column >= len(columns) or weights[i, column] <= 0:
+            continue
+        mapping_data[engine.template_names[rows[i]]] = engine.bone_names[columns[column]]
+    return mapping_data
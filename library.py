@@ -0,0 +1,354 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+import os
+import json
+import sqlite3
+import threading
+from .cache import freeze_json_data, text_digest
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS templates (
+        name TEXT PRIMARY KEY,
+        location TEXT NOT NULL DEFAULT 'CONFIG',
+        data TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS documents (
+        digest TEXT PRIMARY KEY,
+        data TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS mappings (
+        template TEXT NOT NULL,
+        name TEXT NOT NULL,
+        location TEXT NOT NULL DEFAULT 'CONFIG',
+        digest TEXT NOT NULL REFERENCES documents (digest),
+        PRIMARY KEY (template, name)
+    )""",
+    "CREATE INDEX IF NOT EXISTS mappings_digest ON mappings (digest)",
+    """CREATE TABLE IF NOT EXISTS mapping_links (
+        template TEXT NOT NULL,
+        mapping TEXT NOT NULL,
+        name TEXT NOT NULL,
+        bone TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS mapping_links_mapping ON mapping_links (template, mapping)",
+    "CREATE INDEX IF NOT EXISTS mapping_links_bone ON mapping_links (template, bone)",
+)
+
+
+def iterate_json_files(path):
+    # yields (name, data), data is None for a file that can not be read
+    # or does not hold a json object
+    if not os.path.isdir(path):
+        return None
+    for file in sorted(os.listdir(path)):
+        file_path = os.path.join(path, file)
+        if not file.lower().endswith('.json') or not os.path.isfile(file_path):
+            continue
+        try:
+            with open(file_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = None
+        if not isinstance(data, dict):
+            data = None
+        yield file[:-len('.json')], data
+
+
+def encode_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+class Template_Library:
+    file_name = "library.db"
+    connection = None
+    file_path = ''
+    lock = threading.RLock()
+    # incremented on every write, used to refresh cached enum items
+    version = 0
+    # name or (template, mapping): frozen data
+    documents = dict([])
+    # (template, skip names): (version, enum items)
+    enums = dict([])
+    # files skipped by the last folder import
+    skipped = 0
+
+    @classmethod
+    def is_open(cls):
+        return cls.connection is not None
+
+    @classmethod
+    def open(cls, file_path):
+        if cls.connection is not None and cls.file_path == file_path:
+            return cls.connection
+        cls.close()
+        connection = sqlite3.connect(file_path, check_same_thread=False)
+        with cls.lock, connection:
+            for statement in SCHEMA:
+                connection.execute(statement)
+        cls.connection = connection
+        cls.file_path = file_path
+        cls.changed()
+        return connection
+
+    @classmethod
+    def close(cls):
+        with cls.lock:
+            if cls.connection is not None:
+                cls.connection.close()
+            cls.connection = None
+            cls.file_path = ''
+            cls.changed()
+
+    @classmethod
+    def changed(cls):
+        cls.version += 1
+        cls.documents.clear()
+
+    @classmethod
+    def query(cls, statement, parameters=()):
+        with cls.lock:
+            return cls.connection.execute(statement, parameters).fetchall()
+
+    @classmethod
+    def list_templates(cls):
+        rows = cls.query("SELECT name FROM templates ORDER BY name")
+        return [row[0] for row in rows]
+
+    @classmethod
+    def enum_items(cls, template=None, skip_name_list=()):
+        key = (template, tuple(skip_name_list))
+        cached = cls.enums.get(key)
+        if cached and cached[0] == cls.version:
+            return cached[1]
+        if template is None:
+            names = cls.list_templates()
+        else:
+            names = cls.list_mappings(template)
+        names = [n for n in names if n not in skip_name_list]
+        items = [(name, name, '', i) for i, name in enumerate(names)]
+        cls.enums[key] = (cls.version, items)
+        return items
+
+    @classmethod
+    def get_template_location(cls, name):
+        rows = cls.query("SELECT location FROM templates WHERE name = ?", (name,))
+        if not rows:
+            return None
+        return rows[0][0]
+
+    @classmethod
+    def get_template(cls, name):
+        data = cls.documents.get(name)
+        if data is not None:
+            return data
+        rows = cls.query("SELECT data FROM templates WHERE name = ?", (name,))
+        if not rows:
+            return None
+        data = freeze_json_data(json.loads(rows[0][0]))
+        cls.documents[name] = data
+        return data
+
+    @classmethod
+    def list_mappings(cls, template):
+        rows = cls.query(
+            "SELECT name FROM mappings WHERE template = ? ORDER BY location DESC, name",
+            (template,)
+        )
+        return [row[0] for row in rows]
+
+    @classmethod
+    def get_mapping(cls, template, name):
+        key = (template, name)
+        data = cls.documents.get(key)
+        if data is not None:
+            return data
+        rows = cls.query(
+            "SELECT documents.data FROM mappings JOIN documents USING (digest) "
+            "WHERE mappings.template = ? AND mappings.name = ?",
+            (template, name)
+        )
+        if not rows:
+            return None
+        data = freeze_json_data(json.loads(rows[0][0]))
+        cls.documents[key] = data
+        return data
+
+    @classmethod
+    def find_bone_mappings(cls, template, bone):
+        rows = cls.query(
+            "SELECT mapping, name FROM mapping_links "
+            "WHERE template = ? AND bone = ? ORDER BY mapping",
+            (template, bone)
+        )
+        return [(mapping, name) for mapping, name in rows]
+
+    @classmethod
+    def _write_template(cls, connection, name, data, location):
+        connection.execute(
+            "INSERT OR REPLACE INTO templates (name, location, data) VALUES (?, ?, ?)",
+            (name, location, encode_json(data))
+        )
+
+    @classmethod
+    def _write_mapping(cls, connection, template, name, data, location):
+        text = encode_json(data)
+        digest = text_digest(text)
+        rows = connection.execute(
+            "SELECT digest, location FROM mappings WHERE template = ? AND name = ?",
+            (template, name)
+        ).fetchall()
+        if rows and rows[0] == (digest, location):
+            return False
+        connection.execute(
+            "INSERT OR IGNORE INTO documents (digest, data) VALUES (?, ?)",
+            (digest, text)
+        )
+        connection.execute(
+            "INSERT OR REPLACE INTO mappings (template, name, location, digest) "
+            "VALUES (?, ?, ?, ?)",
+            (template, name, location, digest)
+        )
+        connection.execute(
+            "DELETE FROM mapping_links WHERE template = ? AND mapping = ?",
+            (template, name)
+        )
+        connection.executemany(
+            "INSERT INTO mapping_links (template, mapping, name, bone) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (template, name, source, bone)
+                for source, bone in data.items() if bone
+            ]
+        )
+        if rows:
+            cls._remove_orphan_documents(connection)
+        return True
+
+    @classmethod
+    def _remove_orphan_documents(cls, connection):
+        connection.execute(
+            "DELETE FROM documents WHERE digest NOT IN (SELECT digest FROM mappings)"
+        )
+
+    @classmethod
+    def save_template(cls, name, data, location='CONFIG'):
+        with cls.lock, cls.connection as connection:
+            cls._write_template(connection, name, data, location)
+        cls.changed()
+
+    @classmethod
+    def save_mapping(cls, template, name, data, location='CONFIG'):
+        with cls.lock, cls.connection as connection:
+            written = cls._write_mapping(connection, template, name, data, location)
+        if written:
+            cls.changed()
+        return written
+
+    @classmethod
+    def remove_template(cls, name, remove_mappings=False):
+        with cls.lock, cls.connection as connection:
+            connection.execute("DELETE FROM templates WHERE name = ?", (name,))
+            if remove_mappings:
+                connection.execute("DELETE FROM mappings WHERE template = ?", (name,))
+                connection.execute("DELETE FROM mapping_links WHERE template = ?", (name,))
+                cls._remove_orphan_documents(connection)
+        cls.changed()
+
+    @classmethod
+    def rename_template(cls, name, new_name):
+        with cls.lock, cls.connection as connection:
+            for table, column in (
+                ('templates', 'name'),
+                ('mappings', 'template'),
+                ('mapping_links', 'template'),
+            ):
+                connection.execute(
+                    f"UPDATE {table} SET {column} = ? WHERE {column} = ?",
+                    (new_name, name)
+                )
+        cls.changed()
+
+    @classmethod
+    def remove_mapping(cls, template, name):
+        with cls.lock, cls.connection as connection:
+            connection.execute(
+                "DELETE FROM mappings WHERE template = ? AND name = ?",
+                (template, name)
+            )
+            connection.execute(
+                "DELETE FROM mapping_links WHERE template = ? AND mapping = ?",
+                (template, name)
+            )
+            cls._remove_orphan_documents(connection)
+        cls.changed()
+
+    @classmethod
+    def rename_mapping(cls, template, name, new_name):
+        with cls.lock, cls.connection as connection:
+            connection.execute(
+                "UPDATE mappings SET name = ? WHERE template = ? AND name = ?",
+                (new_name, template, name)
+            )
+            connection.execute(
+                "UPDATE mapping_links SET mapping = ? WHERE template = ? AND mapping = ?",
+                (new_name, template, name)
+            )
+        cls.changed()
+
+    @classmethod
+    def import_folders(cls, folders, overwrite=False):
+        # folders in lookup priority: [(location, templates path, bone mapping path), ...]
+        count = 0
+        skipped = 0
+        with cls.lock, cls.connection as connection:
+            templates = set()
+            mappings = set()
+            if not overwrite:
+                templates.update(
+                    row[0] for row in connection.execute("SELECT name FROM templates")
+                )
+                mappings.update(
+                    connection.execute("SELECT template, name FROM mappings")
+                )
+            for location, templates_path, mapping_path in folders:
+                for name, data in iterate_json_files(templates_path):
+                    if data is None:
+                        skipped += 1
+                        continue
+                    if name in templates:
+                        continue
+                    cls._write_template(connection, name, data, location)
+                    templates.add(name)
+                    count += 1
+                if not os.path.isdir(mapping_path):
+                    continue
+                for template in sorted(os.listdir(mapping_path)):
+                    template_mapping_path = os.path.join(mapping_path, template)
+                    for name, data in iterate_json_files(template_mapping_path):
+                        if data is None:
+                            skipped += 1
+                            continue
+                        if (template, name) in mappings:
+                            continue
+                        cls._write_mapping(connection, template, name, data, location)
+                        mappings.add((template, name))
+                        count += 1
+        cls.skipped = skipped
+        cls.changed()
+        return count
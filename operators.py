@@ -21,6 +21,7 @@ import os
 from bpy.types import Operator
 from .functions import *
 from .template import Armature_Templates as AT
+from .guess import Guess_Engine, Guess_Matrix, Guess_Spatial, get_unique_mapping_data
 
 
 class AT_OT_rename_skeleton_bones(Operator):
@@ -51,7 +52,7 @@ class AT_OT_rename_skeleton_bones(Operator):
     def execute(self, context):
         obj = context.active_object
         bone_data = get_mapped_bones_data(context)
-        bone_names = [b.name for b in obj.data.bones]
+        bone_names = Bone_Index.get(obj.data).indices
         if self.target == 'LEFT':
             for name in bone_data:
                 bone_name = bone_data.get(name)
@@ -68,6 +69,8 @@ class AT_OT_rename_skeleton_bones(Operator):
                 bone = obj.data.bones.get(bone_name)
                 if bone and name:
                     bone.name = name
+        Bone_Index.invalidate(obj.data)
+        Mapping_Coverage.invalidate()
         # update skin modifier for 3.0+
         for ob in bpy.data.objects:
             if ob.type == 'MESH':
@@ -109,6 +112,13 @@ class AT_OT_save_bone_mapping(Operator):
             self.report({'ERROR'}, "The file name can't be empty!")
             return {'FINISHED'}
 
+        save_data = get_mapped_bones_data(context)
+        if Template_Library.is_open():
+            name = self.mapping if self.overwrite else base_file_name(self.name)
+            if not Template_Library.save_mapping(props(context).templates, name, save_data):
+                self.report({'INFO'}, "The mapping is unchanged")
+            return {'FINISHED'}
+
         file_name = check_extension(self.name)
 
         native_mapping_path = get_native_mapping_path(props(context).templates)
@@ -117,15 +127,15 @@ class AT_OT_save_bone_mapping(Operator):
             json_file_path = os.path.join(
                 config_mapping_path, self.mapping + ".json"
             )
-            if not os.path.isfile(json_file_path):
-                json_file_path = os.path.join(
-                    native_mapping_path, self.mapping + ".json"
-                )
+            native_file_path = os.path.join(
+                native_mapping_path, self.mapping + ".json"
+            )
+            if not os.path.isfile(json_file_path) and os.path.isfile(native_file_path):
+                json_file_path = native_file_path
         else:
             json_file_path = os.path.join(config_mapping_path, file_name)
 
-        save_data = get_mapped_bones_data(context)
-        save_json_data(json_file_path, save_data)
+        save_json_data(json_file_path, save_data, report_unchanged=True)
         return {'FINISHED'}
 
     def draw(self, context):
@@ -186,8 +196,7 @@ class AT_OT_load_bone_mapping(Operator):
 
     def invoke(self, context, event):
         self.filename = ".json"
-        self.directory = os.path.join(get_config_path(), "bone_mapping")
-        validate_path(self.directory)
+        self.directory = get_config_path("bone_mapping")
         context.window_manager.fileselect_add(self)
         return {'RUNNING_MODAL'}
 
@@ -197,8 +206,11 @@ class AT_OT_load_bone_mapping(Operator):
             self.report({'ERROR'}, msg)
             return {'FINISHED'}
         props(context)['bone_mapping'] = 0
-        file_data = get_json_data(self.filepath)
-        apply_bone_mapping_data(context, file_data)
+        try:
+            apply_bone_mapping_file(context, self.filepath)
+        except ValueError as error:
+            self.report({'ERROR'}, f"Can't read the mapping file: {error}")
+            return {'CANCELLED'}
         redraw_area('PROPERTIES')
         return {'FINISHED'}
 
@@ -221,8 +233,9 @@ class AT_OT_map_selected_bone(Operator):
             bones = obj.data.edit_bones
         if not bones.active:
             return {'FINISHED'}
-        search_props = context.window_manager.at_search_list_props
-        prop = search_props.get(self.prop_name)
+        prop = Search_Props_Index.get(context, self.prop_name)
+        if prop is None:
+            return {'CANCELLED'}
         prop.bone = bones.active.name
         redraw_area('PROPERTIES')
         return {'FINISHED'}
@@ -237,8 +250,9 @@ class AT_OT_map_custom_bone_name(Operator):
     custom_name: bpy.props.StringProperty(name="Custom Name")
 
     def invoke(self, context, event):
-        search_props = context.window_manager.at_search_list_props
-        self.prop = search_props.get(self.prop_name)
+        self.prop = Search_Props_Index.get(context, self.prop_name)
+        if self.prop is None:
+            return {'CANCELLED'}
         self.custom_name = self.prop.bone
         return context.window_manager.invoke_props_dialog(self, width=250)
 
@@ -323,11 +337,19 @@ class AT_OT_remove_bone_mapping(Operator):
         return context.window_manager.invoke_confirm(self, event)
 
     def execute(self, context):
+        if Template_Library.is_open():
+            Template_Library.remove_mapping(
+                props(context).templates, props(context).bone_mapping
+            )
+            props(context)['bone_mapping'] = 0
+            return {'FINISHED'}
+        report_save_errors(self, Json_Saver.flush())
         native_path = get_native_mapping_path(props(context).templates)
         config_path = get_config_mapping_path(props(context).templates)
         file_path = os.path.join(config_path, props(context).bone_mapping + ".json")
         if os.path.isfile(file_path):
             os.remove(file_path)
+            Directory_Index.invalidate(config_path)
             props(context)['bone_mapping'] = 0
             return {'FINISHED'}
 
@@ -335,6 +357,7 @@ class AT_OT_remove_bone_mapping(Operator):
         if os.path.isfile(file_path):
             props(context)['bone_mapping'] = 0
             os.remove(file_path)
+            Directory_Index.invalidate(native_path)
             return {'FINISHED'}
 
         msg = "Armature Templates: The mapping file '" + props(context).bone_mapping + "' does not exist"
@@ -713,12 +736,12 @@ class POPUP_OT_Create_Template(Operator):
         props(context).active_temp_item_list = 0
         props(context).active_temp_category_list = 0
         if self.edit:
-            AT.template_data = get_json_data(get_template_path())
+            AT.template_data = get_template_data(mutable=True)
             AT.active_category = [c for c in AT.template_data][0]
             AT.bone_list = evaluate_bone_list(
                 context, context.active_object, AT.template_data
             )
-            if is_native_template_path(props(context).templates):
+            if is_native_template(props(context).templates):
                 self.template_name = props(context).templates + '_edited'
             else:
                 self.template_name = props(context).templates
@@ -841,20 +864,19 @@ class POPUP_OT_Create_Template(Operator):
         if self.template_name == '':
             self.report({'ERROR'}, "The name can't be empty!")
             return {'FINISHED'}
-        template_name = check_extension(self.template_name)
         base_name = base_file_name(self.template_name)
         if self.edit:
-            location, template_path = get_template_path(return_type=True)
+            location = 'NATIVE' if is_native_template(base_name) else 'CONFIG'
             if base_name == props(context).templates:
-                save_json_data(template_path, AT.template_data)
+                save_template_data(base_name, AT.template_data, location)
                 save_custom_file(base_name, AT.template_data, location=location)
+                Template_State.invalidate()
                 props(context)['bone_category'] = 0
                 initiate_search_props()
                 redraw_area('PROPERTIES')
                 return {'FINISHED'}
-        config_templates_path = os.path.join(get_config_path(), "templates")
-        config_file_path = os.path.join(config_templates_path, template_name)
-        save_json_data(config_file_path, AT.template_data)
+        save_template_data(base_name, AT.template_data)
+        Template_State.invalidate()
         # save blank custom mapping
         save_custom_file(base_name, AT.template_data)
         return {'FINISHED'}
@@ -883,10 +905,21 @@ class AT_OT_remove_template(Operator):
         row.prop(self, 'remove_mapping_files')
 
     def execute(self, context):
-        location, template_file_path = get_template_path(return_type=True)
         template = props(context).templates
+        if Template_Library.is_open():
+            Template_Library.remove_template(
+                template, remove_mappings=self.remove_mapping_files
+            )
+            props(context)['templates'] = 0
+            props(context)['bone_mapping'] = 0
+            initiate_search_props()
+            redraw_area('PROPERTIES')
+            return {'FINISHED'}
+        report_save_errors(self, Json_Saver.flush())
+        location, template_file_path = get_template_path(return_type=True)
         if os.path.isfile(template_file_path):
             os.remove(template_file_path)
+            Directory_Index.invalidate()
             props(context)['templates'] = 0
         else:
             msg = "Armature Templates: The template file '" + template + "' does not exist"
@@ -901,6 +934,8 @@ class AT_OT_remove_template(Operator):
         mapping_native_path = get_native_mapping_path(template)
         mapping_config_path = get_config_mapping_path(template)
         import shutil
+        Directory_Index.invalidate()
+        Config_Paths.invalidate()
         if os.path.isdir(mapping_config_path):
             shutil.rmtree(mapping_config_path)
             props(context)['bone_mapping'] = 0
@@ -930,13 +965,20 @@ class AT_OT_rename_template(Operator):
         row.prop(self, 'new_name')
 
     def execute(self, context):
-        location, template_file_path = get_template_path(return_type=True)
         template = props(context).templates
+        if Template_Library.is_open():
+            Template_Library.rename_template(template, base_file_name(self.new_name))
+            initiate_search_props()
+            redraw_area('PROPERTIES')
+            return {'FINISHED'}
+        report_save_errors(self, Json_Saver.flush())
+        location, template_file_path = get_template_path(return_type=True)
         mapping_path = get_mapping_path(template, location=location)
         if os.path.isfile(template_file_path):
             new_name = check_extension(self.new_name)
             new_file = os.path.join(os.path.dirname(template_file_path), new_name)
             os.rename(template_file_path, new_file)
+            Directory_Index.invalidate()
         else:
             msg = "Armature Templates: The template file '" + template + "' does not exist"
             self.report({'ERROR'}, msg)
@@ -950,6 +992,8 @@ class AT_OT_rename_template(Operator):
         new_template_folder = base_file_name(self.new_name)
         new_path = os.path.join(parent_folder, new_template_folder)
         os.rename(mapping_path, new_path)
+        Directory_Index.invalidate()
+        Config_Paths.invalidate()
         redraw_area('PROPERTIES')
         return {'FINISHED'}
 
@@ -973,6 +1017,14 @@ class AT_OT_rename_mapping(Operator):
         row.prop(self, 'new_name')
 
     def execute(self, context):
+        if Template_Library.is_open():
+            Template_Library.rename_mapping(
+                props(context).templates, props(context).bone_mapping,
+                base_file_name(self.new_name)
+            )
+            redraw_area('PROPERTIES')
+            return {'FINISHED'}
+        report_save_errors(self, Json_Saver.flush())
         location, template_file_path = get_template_path(return_type=True)
         mapping = check_extension(props(context).bone_mapping)
         mapping_path = get_mapping_path(props(context).templates, location=location)
@@ -984,6 +1036,7 @@ class AT_OT_rename_mapping(Operator):
             new_name = check_extension(self.new_name)
             new_file = os.path.join(mapping_path, new_name)
             os.rename(mapping_file_path, new_file)
+            Directory_Index.invalidate()
         else:
             msg = "Armature Templates: The template file '" + props(context).bone_mapping + "' does not exist"
             self.report({'ERROR'}, msg)
@@ -1008,81 +1061,91 @@ class AT_OT_guess_mapping_bones(Operator):
         description='Remap in the current category only',
         default=False
     )
+    method: bpy.props.EnumProperty(
+        name='Method',
+        items=[
+            ('INDEX', 'Name Parts', 'Score only the bones that share a name part with the template name'),
+            ('MATRIX', 'Matrix', 'Score all the names at once, faster on large armatures'),
+            ('SPATIAL', 'Rest Pose', 'Match the rest pose positions of the bones with an armature that follows the template naming')
+        ],
+        default='INDEX'
+    )
+    reference: bpy.props.EnumProperty(
+        name="Template Armature",
+        description="Armature with the template bone names to compare the bone positions with",
+        items=scene_armatures_enum,
+        default=0
+    )
+    unique_bones: bpy.props.BoolProperty(
+        name='One Bone per Name',
+        description='Map each bone of the armature to a single template name, keeping the best total match',
+        default=False
+    )
 
     def invoke(self, context, event):
         return context.window_manager.invoke_props_dialog(self, width=250)
 
-    def find_number(self, find_string, source_name):
-        import re
-        if not find_string.isnumeric():
-            return False
-        source_parts = re.findall(r'\d+|[A-Za-z]+', source_name.lower())
-        for sp in source_parts:
-            if sp.isnumeric() and int(find_string) == int(sp):
-                return True
-
-    def get_bones_match_data(self, bones):
-        import re
-        template_data = get_json_data(get_template_path())
-        bones_match = {}
+    def draw(self, context):
+        layout = self.layout
+        col = layout.column()
+        col.use_property_split = True
+        col.prop(self, 'method')
+        if self.method == 'SPATIAL':
+            col.prop(self, 'reference')
+        else:
+            col.prop(self, 'search_source')
+        col.prop(self, 'category_only')
+        col.prop(self, 'unique_bones')
+
+    def get_template_names(self):
+        template_data = get_template_data()
         for category, i, name in iterate_template_data(template_data):
             if self.category_only and props().bone_category != category:
                 continue
-            bones_match[name] = {}
-            for b in bones:
-                if self.search_source:
-                    search_name = b.name
-                    source_name = name
-                else:
-                    search_name = name
-                    source_name = b.name
-                n_parts = re.findall(r'\d+|[A-Za-z]+', search_name)
-                found_count = 0
-                found_parts = []
-                for p in n_parts:
-                    if not text_lookup(p.lower(), source_name.lower()) and\
-                            not self.find_number(p, source_name):
-                        continue
-                    if p.lower() == 'l' or p.lower() == 'r':
-                        source_parts = re.findall(r'\d+|[A-Za-z]+', source_name.lower())
-                        if p.lower() not in source_parts:
-                            continue
-                    found_count += 1
-                    found_parts.append(p)
-                bones_match[name][b.name] = [found_count] + found_parts
-        return bones_match
-
-    def get_mapping_data(self, bones):
-        mapping_data = {}
-        bones_match = self.get_bones_match_data(bones)
-        for name in bones_match:
-            biggest_match = 0
-            bone_match = ''
-            for b in bones:
-                match_list = bones_match[name].get(b.name)
-                match_count = match_list[0]
-                match_parts = [p for i, p in enumerate(match_list) if i != 0]
-                if match_count <= 2:
-                    is_irrelevant = 0
-                    for part in match_parts:
-                        if part.lower() == 'l' or\
-                                part.lower() == 'r' or\
-                                part.isnumeric():
-                            is_irrelevant += 1
-                    if is_irrelevant == match_count:
-                        continue
-                if biggest_match < match_count:
-                    biggest_match = match_count
-                    bone_match = b.name
-                if biggest_match == match_count:
-                    if len(bone_match) > len(b.name):
-                        bone_match = b.name
-            mapping_data[name] = bone_match
-        return mapping_data
+            yield name
+
+    def get_spatial_engine(self, context, bones):
+        obj = context.active_object
+        reference = bpy.data.objects[self.reference]
+        template_bones = Bone_Index.find_bones(
+            reference.data, dict.fromkeys(self.get_template_names())
+        )
+        return Guess_Spatial(
+            get_spatial_bones(reference, template_bones),
+            get_spatial_bones(obj, [b.bone for b in bones])
+        )
+
+    def get_mapping_data(self, context, bones):
+        if self.method == 'SPATIAL':
+            engine = self.get_spatial_engine(context, bones)
+        elif self.method == 'MATRIX':
+            bone_names = [b.name for b in bones]
+            engine = Guess_Matrix(
+                self.get_template_names(), bone_names,
+                search_source=self.search_source,
+                bone_tokens=Bone_Index.get_tokens(context.active_object.data, bone_names)
+            )
+        else:
+            bone_names = [b.name for b in bones]
+            engine = Guess_Engine(
+                self.get_template_names(), bone_names,
+                search_source=self.search_source,
+                bone_tokens=Bone_Index.get_tokens(context.active_object.data, bone_names)
+            )
+        if self.unique_bones:
+            return get_unique_mapping_data(engine)
+        return engine.get_mapping_data()
 
     def execute(self, context):
         bones = get_bones_in_selected_layers(context, None)
-        mapping_data = self.get_mapping_data(bones)
+        if self.method == 'SPATIAL':
+            if not self.reference:
+                self.report({'ERROR'}, "There is no other armature in the scene to compare with.")
+                return {'CANCELLED'}
+            if not bones:
+                self.report({'ERROR'}, "Selected bone layers do not contain any bones.")
+                return {'CANCELLED'}
+        mapping_data = self.get_mapping_data(context, bones)
         apply_bone_mapping_data(context, mapping_data)
         redraw_area('PROPERTIES')
         return {'FINISHED'}
@@ -1688,17 +1751,15 @@ class AT_OT_bake_animation(Operator):
                 self.report({'WARNING'}, msg)
             scale_armature(context, armature, self.scale_value, self.empty_name)
 
-        bones = [
-            armature.data.bones.get(n)
-            for n in iterate_template_links(context, self.source_list)
-        ]
+        bones = Bone_Index.find_bones(
+            armature.data, iterate_template_links(context, self.source_list)
+        )
         mode = context.mode
         if mode != 'POSE':
             bpy.ops.object.posemode_toggle()
         bpy.ops.pose.select_all(action='DESELECT')
         for b in bones:
-            if hasattr(b, 'select'):
-                b.select = True
+            b.select = True
         bpy.ops.nla.bake(
             frame_start=self.start_frame,
             frame_end=self.end_frame,
@@ -1788,14 +1849,11 @@ class AT_OT_mapping_from_ue2rigify(Operator):
         return context.window_manager.invoke_props_dialog(self, width=250)
 
     def execute(self, context):
-        json_data = get_json_data(self.links)
-        mapping_data = {}
-        for i in json_data:
-            if self.swap_source:
-                mapping_data[i.get('to_socket')] = i.get('from_socket')
-            else:
-                mapping_data[i.get('from_socket')] = i.get('to_socket')
-        apply_bone_mapping_data(context, mapping_data)
+        try:
+            apply_bone_mapping_file(context, self.links, swap_links=self.swap_source)
+        except ValueError as error:
+            self.report({'ERROR'}, f"Can't read the links file: {error}")
+            return {'CANCELLED'}
         redraw_area('PROPERTIES')
         return {'FINISHED'}
 
@@ -1821,6 +1879,108 @@ class AT_OT_browse_config_folder(Operator):
         return {'FINISHED'}
 
 
+class AT_OT_import_template_library(Operator):
+    bl_idname = "at.import_template_library"
+    bl_label = "Import Folders"
+    bl_description = "Import the template and mapping .json files from the native and the user config folders into the template library"
+
+    overwrite: bpy.props.BoolProperty(
+        name="Overwrite",
+        description="Replace the templates and mappings that are already in the library",
+        default=False
+    )
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self, width=250)
+
+    def execute(self, context):
+        if not Template_Library.is_open():
+            return {'CANCELLED'}
+        count = import_template_library(overwrite=self.overwrite)
+        if Template_Library.skipped:
+            self.report(
+                {'WARNING'},
+                f"Imported {count} files to the template library, "
+                f"skipped {Template_Library.skipped} unreadable files"
+            )
+            return {'FINISHED'}
+        self.report({'INFO'}, f"Imported {count} files to the template library")
+        return {'FINISHED'}
+
+
+class AT_OT_export_mapping_pack(Operator):
+    bl_idname = "at.export_mapping_pack"
+    bl_label = "Export Mapping Pack"
+    bl_description = "Save the current template with all of its mapping files to a single compressed archive"
+
+    filepath: bpy.props.StringProperty(
+        subtype="FILE_PATH"
+    )
+    filter_glob: bpy.props.StringProperty(
+        default="*" + pack.EXTENSION,
+        options={'HIDDEN'}
+    )
+
+    def invoke(self, context, event):
+        directory = os.path.dirname(bpy.data.filepath) if bpy.data.filepath else os.path.expanduser('~')
+        self.filepath = os.path.join(directory, props(context).templates + pack.EXTENSION)
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        template = props(context).templates
+        template_data = get_template_data(template)
+        if template_data is None:
+            msg = "Armature Templates: The template '" + template + "' does not exist"
+            self.report({'ERROR'}, msg)
+            return {'CANCELLED'}
+        file_path = check_extension(self.filepath, extension=pack.EXTENSION)
+        write_mapping_pack(
+            file_path, template, template_data, get_template_mappings(template)
+        )
+        self.report({'INFO'}, "The mapping pack has been saved to: " + file_path)
+        return {'FINISHED'}
+
+
+class AT_OT_import_mapping_pack(Operator):
+    bl_idname = "at.import_mapping_pack"
+    bl_label = "Import Mapping Pack"
+    bl_description = "Add a template with its mapping files from a mapping pack archive to the user config folder"
+
+    filepath: bpy.props.StringProperty(
+        subtype="FILE_PATH"
+    )
+    filter_glob: bpy.props.StringProperty(
+        default="*" + pack.EXTENSION,
+        options={'HIDDEN'}
+    )
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        import shutil
+        import zipfile
+        try:
+            template = Mapping_Pack.template_name(self.filepath)
+        except (OSError, ValueError, zipfile.BadZipFile):
+            template = None
+        if not template:
+            self.report({'ERROR'}, "Selected file is not a mapping pack")
+            return {'CANCELLED'}
+        if not pack.is_valid_template_name(template):
+            self.report({'ERROR'}, "The mapping pack has an invalid template name: " + template)
+            return {'CANCELLED'}
+        pack_path = get_pack_path(template)
+        if os.path.abspath(self.filepath) != os.path.abspath(pack_path):
+            shutil.copyfile(self.filepath, pack_path)
+        Directory_Index.invalidate()
+        self.report({'INFO'}, "The mapping pack '" + template + "' has been imported")
+        redraw_area('PROPERTIES')
+        return {'FINISHED'}
+
+
 class AT_OT_save_metarig(Operator):
     bl_idname = "at.save_metarig"
     bl_label = "Save Meta-Rig"
@@ -1850,8 +2010,7 @@ class AT_OT_save_metarig(Operator):
             groups=True,
             widgets=True
         )
-        directory = os.path.join(get_config_path(), "metarigs")
-        validate_path(directory)
+        directory = get_config_path("metarigs")
         file_name = check_extension(self.metarig_name, extension='.py')
         file_path = os.path.join(directory, file_name)
         write_to_file(file_path, text)
@@ -1878,7 +2037,7 @@ class AT_OT_load_metarig(Operator):
         select_object(obj)
         bone_groups.execute(None, context)
 
-        directory = os.path.join(get_config_path(), "metarigs")
+        directory = get_config_path("metarigs")
         file_path = os.path.join(directory, self.metarig_name + ".py")
         metarig_script = get_module_from_path(file_path, self.metarig_name + ".py")
         metarig_script.create(obj)
@@ -1900,13 +2059,13 @@ class AT_OT_delete_metarig(Operator):
         return context.window_manager.invoke_confirm(self, event)
 
     def execute(self, context):
-        directory = os.path.join(get_config_path(), "metarigs")
-        validate_path(directory)
+        directory = get_config_path("metarigs")
         file_name = check_extension(self.metarig_name, extension='.py')
         file_path = os.path.join(directory, file_name)
         if not os.path.isfile(file_path):
             return {'FINISHED'}
         os.remove(file_path)
+        Directory_Index.invalidate(directory)
 
         return {'FINISHED'}
 
@@ -1946,16 +2105,14 @@ class AT_OT_select_category_bone_list(Operator):
         obj = context.active_object
         mode = context.mode.split('_')[0]
         if mode == 'POSE':
-            bones = [
-                obj.data.bones.get(n)
-                for n in iterate_template_category_links(context, self.select_list)
-            ]
+            bones = Bone_Index.find_bones(
+                obj.data, iterate_template_category_links(context, self.select_list)
+            )
             if not self.append_to_selection:
                 bpy.ops.pose.select_all(action='DESELECT')
             for b in bones:
-                if hasattr(b, 'select'):
-                    b.select = True
-                    obj.data.bones.active = b
+                b.select = True
+                obj.data.bones.active = b
         elif mode == 'EDIT':
             bones = [
                 obj.data.edit_bones.get(n)
@@ -2049,6 +2206,9 @@ classes = [
     AT_OT_bake_animation,
     AT_OT_scale_armature,
     AT_OT_browse_config_folder,
+    AT_OT_import_template_library,
+    AT_OT_export_mapping_pack,
+    AT_OT_import_mapping_pack,
     TEMPLATE_UL_Armature_bones,
     TEMPLATE_UL_Category_bones,
     POPUP_OT_Create_Template,
@@ -0,0 +1,163 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+import os
+import json
+import zipfile
+import tempfile
+import threading
+from .cache import file_signature, freeze_json_data, thaw_json_data
+
+EXTENSION = '.atpack'
+TEMPLATE_MEMBER = 'template.json'
+MAPPING_FOLDER = 'bone_mapping/'
+
+
+def is_valid_template_name(name):
+    # the template name becomes a file name in the packs folder
+    if not name or name == '.' or '..' in name:
+        return False
+    if '/' in name or '\\' in name or os.sep in name:
+        return False
+    return os.path.basename(name) == name
+
+
+def write_mapping_pack(file_path, template, template_data, mappings):
+    directory, name = os.path.split(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(prefix='.' + name + '.', suffix='.tmp', dir=directory)
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(temp_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.comment = template.encode('utf-8')
+            archive.writestr(
+                TEMPLATE_MEMBER,
+                json.dumps(thaw_json_data(template_data), ensure_ascii=False, indent=4)
+            )
+            for mapping, mapping_data in mappings.items():
+                archive.writestr(
+                    MAPPING_FOLDER + mapping + '.json',
+                    json.dumps(thaw_json_data(mapping_data), ensure_ascii=False, indent=4)
+                )
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class Mapping_Pack:
+    # absolute path: (signature, template name, mapping names)
+    indexes = dict([])
+    # (absolute path, member): (signature, frozen data)
+    members = dict([])
+    # (absolute path, skip names): (base items, mapping names, enum items)
+    enums = dict([])
+    lock = threading.RLock()
+
+    @classmethod
+    def key(cls, file_path):
+        return os.path.normcase(os.path.abspath(file_path))
+
+    @classmethod
+    def index(cls, file_path):
+        key = cls.key(file_path)
+        signature = file_signature(key)
+        if signature is None:
+            return None
+        with cls.lock:
+            cached = cls.indexes.get(key)
+            if cached and cached[0] == signature:
+                return cached
+        with zipfile.ZipFile(key) as archive:
+            template = archive.comment.decode('utf-8')
+            names = archive.namelist()
+        if TEMPLATE_MEMBER not in names:
+            raise ValueError(f"{file_path} is not a mapping pack")
+        mappings = tuple(sorted(
+            n[len(MAPPING_FOLDER):-len('.json')] for n in names
+            if n.startswith(MAPPING_FOLDER) and n.endswith('.json')
+        ))
+        cached = (signature, template, mappings)
+        with cls.lock:
+            cls.indexes[key] = cached
+        return cached
+
+    @classmethod
+    def template_name(cls, file_path):
+        index = cls.index(file_path)
+        if not index:
+            return None
+        return index[1]
+
+    @classmethod
+    def mapping_names(cls, file_path):
+        try:
+            index = cls.index(file_path)
+        except (OSError, ValueError, zipfile.BadZipFile):
+            return ()
+        if not index:
+            return ()
+        return index[2]
+
+    @classmethod
+    def read(cls, file_path, member):
+        key = cls.key(file_path)
+        signature = file_signature(key)
+        if signature is None:
+            return None
+        with cls.lock:
+            cached = cls.members.get((key, member))
+            if cached and cached[0] == signature:
+                return cached[1]
+        with zipfile.ZipFile(key) as archive:
+            try:
+                text = archive.read(member)
+            except KeyError:
+                return None
+        data = freeze_json_data(json.loads(text.decode('utf-8')))
+        with cls.lock:
+            cls.members[(key, member)] = (signature, data)
+        return data
+
+    @classmethod
+    def get_template(cls, file_path):
+        return cls.read(file_path, TEMPLATE_MEMBER)
+
+    @classmethod
+    def get_mapping(cls, file_path, mapping):
+        return cls.read(file_path, MAPPING_FOLDER + mapping + '.json')
+
+    @classmethod
+    def enum_items(cls, file_path, base_items, skip_name_list=()):
+        names = cls.mapping_names(file_path)
+        if not names:
+            return base_items
+        key = (cls.key(file_path), tuple(skip_name_list))
+        with cls.lock:
+            cached = cls.enums.get(key)
+            if cached and cached[0] is base_items and cached[1] is names:
+                return cached[2]
+        existing = set(item[0] for item in base_items)
+        items = list(base_items)
+        for name in names:
+            if name in existing or name in skip_name_list:
+                continue
+            items.append((name, name, 'Mapping pack', len(items)))
+        with cls.lock:
+            cls.enums[key] = (base_items, names, items)
+        return items
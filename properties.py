@@ -49,6 +49,20 @@ class AT_Properties(PropertyGroup):
         items=bone_mapping_enum,
         update=update_apply_bone_mapping
     )
+    mapping_filter: EnumProperty(
+        name="Mapping Filter",
+        description='Show the mapping items of the current category',
+        items=[
+            ('ALL', 'All', 'Show all items of the category'),
+            ('MAPPED', 'Mapped', 'Show the items that have a bone assigned'),
+            ('UNMAPPED', 'Unmapped', 'Show the items without a bone assigned'),
+        ],
+        default='ALL'
+    )
+    active_search_prop: IntProperty(
+        name='Active mapping item',
+        min=0, default=0
+    )
     ui_switching: BoolProperty(
         default=False
     )
@@ -60,13 +74,12 @@ class AT_Properties(PropertyGroup):
         name='Active item in the list',
         min=0, soft_min=0, max=100000, soft_max=10000, default=0
     )
-    for i in range(32):
-        exec((
-            f"armature_layer_{str(i)}: "
-            f"BoolProperty(name='Armature Layer {str(i)}', "
-            "update=update_armature_layers, "
-            "default=False)"
-        ))
+    armature_layers: BoolVectorProperty(
+        name='Armature Layers',
+        size=32, subtype='LAYER',
+        update=update_armature_layers,
+        default=(False,) * 32
+    )
 
     @property
     def prefs(self):
@@ -81,10 +94,50 @@ class AT_Preferences(AddonPreferences):
         description='Turn on/off access to experimental features',
         default=False
     )
+    use_library: BoolProperty(
+        name="Template Library",
+        description=(
+            'Store templates and mappings in a single SQLite file in the user config folder '
+            'instead of separate .json files'
+        ),
+        update=update_use_library,
+        default=False
+    )
+    use_preload: BoolProperty(
+        name="Preload Templates",
+        description='Read all templates and mappings in the background when the add-on starts',
+        default=True
+    )
+    use_compact_format: BoolProperty(
+        name="Compact Templates",
+        description=(
+            'Keep a compact .atc copy next to each .json template, '
+            'so a single category can be read without parsing the whole template'
+        ),
+        default=False
+    )
 
     def draw(self, context):
         layout = self.layout
         layout.prop(self, 'experimental')
+        row = layout.row(align=True)
+        row.prop(self, 'use_library')
+        sub_row = row.row(align=True)
+        sub_row.enabled = self.use_library
+        sub_row.operator("at.import_template_library", icon='IMPORT')
+        layout.prop(self, 'use_compact_format')
+        row = layout.row()
+        row.prop(self, 'use_preload')
+        if Json_Preloader.is_running():
+            row.label(text="Preloading...")
+        elif Json_Preloader.finished:
+            text = (
+                f"Preloaded {Json_Preloader.files} files "
+                f"in {Json_Preloader.seconds * 1000:.0f} ms"
+            )
+            if Json_Preloader.errors:
+                text += f", {Json_Preloader.errors} failed"
+            row.label(text=text)
 
 
 class Search_Bones(PropertyGroup):
@@ -110,6 +163,7 @@ class Armature_settings_coll(PropertyGroup):
     name: StringProperty(name="Name")
     template: StringProperty(name="Template")
     mapping: StringProperty(name="Mapping")
+    # hexadecimal layer mask, older files store 32 space separated 0/1 values
     bone_list: StringProperty(name="Bone List")
     mapping_data: StringProperty(name="Mapping Data")
 
@@ -137,6 +191,10 @@ def register():
     armature = bpy.types.Armature
     armature.armtemp_settings = PointerProperty(type=Armature_settings_coll)
 
+    addon = bpy.context.preferences.addons.get(__package__)
+    if addon and addon.preferences.use_library:
+        open_template_library()
+
 
 def unregister():
     for cls in classes:
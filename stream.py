@@ -0,0 +1,138 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+import os
+import re
+import json
+import codecs
+
+WHITESPACE = ' \t\n\r'
+DELIMITERS = WHITESPACE + ',:]}'
+STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+
+
+class Json_Stream:
+    decoder = json.JSONDecoder()
+
+    def __init__(self, file_path, chunk_size=1 << 16):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.size = 0
+        self.bytes_read = 0
+        self.is_array = False
+
+    @property
+    def progress(self):
+        if not self.size:
+            return 1.0
+        return self.bytes_read / self.size
+
+    def fill(self):
+        chunk = self.file.read(self.chunk_size)
+        self.bytes_read += len(chunk)
+        text = self.text_decoder.decode(chunk, final=not chunk)
+        if not chunk and not text:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.position:] + text
+        self.position = 0
+        return True
+
+    def skip_whitespace(self):
+        while True:
+            while self.position < len(self.buffer) and\
+                    self.buffer[self.position] in WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer) or not self.fill():
+                return None
+
+    def expect(self, chars):
+        self.skip_whitespace()
+        if self.position >= len(self.buffer) or self.buffer[self.position] not in chars:
+            raise ValueError(
+                f"Expecting one of '{chars}' at byte {self.bytes_read} in {self.file_path}"
+            )
+        char = self.buffer[self.position]
+        self.position += 1
+        return char
+
+    def peek(self):
+        self.skip_whitespace()
+        if self.position >= len(self.buffer):
+            return ''
+        return self.buffer[self.position]
+
+    def value(self):
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # a number can be cut off at the end of the chunk
+            if not self.eof and (
+                end == len(self.buffer) or self.buffer[end] not in DELIMITERS
+            ) and self.fill():
+                continue
+            self.position = end
+            return value
+
+    def skip_value(self):
+        self.skip_whitespace()
+        if self.position >= len(self.buffer):
+            raise ValueError(f"Unexpected end of {self.file_path}")
+        while True:
+            match = STRING.match(self.buffer, self.position)
+            if match:
+                self.position = match.end()
+                return None
+            if self.buffer[self.position] != '"':
+                self.value()
+                return None
+            if not self.fill():
+                raise ValueError(f"Unterminated string in {self.file_path}")
+
+    def iterate(self, filter_key=None):
+        # yields (key, value) for a top level object and (None, value) for an array,
+        # values of the keys rejected by filter_key are skipped without decoding
+        with open(self.file_path, 'rb') as self.file:
+            self.size = os.fstat(self.file.fileno()).st_size
+            self.bytes_read = 0
+            self.buffer = ''
+            self.position = 0
+            self.eof = False
+            self.text_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+            opening = self.expect('{[')
+            self.is_array = opening == '['
+            closing = ']' if self.is_array else '}'
+            if self.peek() == closing:
+                return None
+            while True:
+                if self.is_array:
+                    yield None, self.value()
+                else:
+                    key = self.value()
+                    self.expect(':')
+                    if filter_key is None or filter_key(key):
+                        yield key, self.value()
+                    else:
+                        self.skip_value()
+                if self.expect(',' + closing) == closing:
+                    return None
@@ -18,7 +18,7 @@
 
 import bpy
 import os
-from bpy.types import Panel, Menu, PropertyGroup
+from bpy.types import Panel, Menu, PropertyGroup, UIList
 from .functions import *
 
 
@@ -37,14 +37,25 @@ class AT_PT_Armature_Templates(Panel):
     def __init__(self):
         at_initialization(__class__)
         ui_switch_select(__class__)
-        json_file_path = get_template_path()
-        self.file_data = get_json_data(json_file_path)
-        self.template = props().templates
 
     @classmethod
     def poll(cls, context):
         return context.armature
 
+    def draw_header(self, context):
+        if not props(context).templates:
+            return None
+        coverage = Mapping_Coverage.get(context)
+        total = sum(coverage.values())
+        if not total:
+            return None
+        text = str(coverage['MAPPED']) + '/' + str(total)
+        if coverage['BROKEN']:
+            text += ' (' + str(coverage['BROKEN']) + ' missing)'
+            self.layout.label(text=text, icon='ERROR')
+            return None
+        self.layout.label(text=text)
+
     def draw(self, context):
         layout = self.layout
         row = layout.row()
@@ -67,35 +78,77 @@ class AT_PT_Armature_Templates(Panel):
         sub_row = row.row(align=True)
         sub_row.operator("at.save_bone_mapping", text='Save', icon='EXPORT')
         sub_row.operator("at.load_bone_mapping", text='Load', icon='IMPORT')
-        if not hasattr(self, 'file_data'):
-            return None
         if not props(context).templates:
             return None
+        if not Template_State.is_available():
+            return None
         row = col.row(align=True)
+        coverage = Mapping_Coverage.get(context, props(context).bone_category)
+        text = 'Mapping [' + props(context).bone_category + '] ' +\
+            str(coverage['MAPPED']) + '/' + str(sum(coverage.values()))
         if not props(context).mapping_category:
-            text = 'Mapping [' + props(context).bone_category + ']'
             row.prop(props(), 'mapping_category', text=text, icon='DISCLOSURE_TRI_RIGHT')
             row.operator("at.select_category_bone_list", text='', icon='RESTRICT_SELECT_OFF')
             return None
-        text = 'Mapping [' + props(context).bone_category + ']'
         row.prop(props(), 'mapping_category', text=text, icon='DISCLOSURE_TRI_DOWN')
         row.operator("at.select_category_bone_list", text='', icon='RESTRICT_SELECT_OFF')
-        category_list = self.file_data.get(props(context).bone_category)
+        category_list = Template_State.get_category(props(context).bone_category)
         if not category_list:
             return None
-        search_props = context.window_manager.at_search_list_props
-        box = col.box()
-        for name in category_list:
-            row = box.row(align=True)
-            row.label(text=name)
-            prop = search_props.get(name)
-            if not prop:
-                continue
-            row.operator("at.map_custom_bone_name", text='', icon='OUTLINER_DATA_GP_LAYER').prop_name = name
+        row = col.row(align=True)
+        row.prop(props(), 'mapping_filter', expand=True)
+        col.template_list(
+            "MAPPING_UL_Search_Bones", "",
+            wm, "at_search_list_props", props(), "active_search_prop",
+            rows=min(len(category_list), 20)
+        )
+
+
+class MAPPING_UL_Search_Bones(UIList):
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname):
+        if self.layout_type in {'DEFAULT', 'COMPACT'}:
+            row = layout.row(align=True)
+            row.label(text=item.name)
+            row.operator(
+                "at.map_custom_bone_name", text='', icon='OUTLINER_DATA_GP_LAYER',
+                emboss=False
+            ).prop_name = item.name
             sub_row = row.row(align=True)
             sub_row.scale_x = 1.12
-            sub_row.prop_search(prop, 'bone', wm, "at_bone_data_search_list", text="")
-            row.operator("at.map_selected_bone", text='', icon='TRIA_LEFT').prop_name = name
+            sub_row.prop_search(
+                item, 'bone', context.window_manager, "at_bone_data_search_list", text=""
+            )
+            row.operator(
+                "at.map_selected_bone", text='', icon='TRIA_LEFT', emboss=False
+            ).prop_name = item.name
+        elif self.layout_type in {'GRID'}:
+            layout.alignment = 'CENTER'
+            layout.label(text="")
+
+    def filter_items(self, context, data, propname):
+        items = getattr(data, propname)
+        helper = bpy.types.UI_UL_list
+        category = props(context).bone_category
+        mode = props(context).mapping_filter
+        if self.filter_name:
+            flags = helper.filter_items_by_name(
+                self.filter_name, self.bitflag_filter_item, items, "name",
+                reverse=False
+            )
+        else:
+            flags = [self.bitflag_filter_item] * len(items)
+        # the flags are flipped by Blender when the filter is inverted, the items
+        # of the other categories and filter modes have to stay hidden anyway
+        hidden = self.bitflag_filter_item if self.use_filter_invert else 0
+        for i, item in enumerate(items):
+            if item.category != category or\
+                    (mode == 'MAPPED' and not item.bone) or\
+                    (mode == 'UNMAPPED' and item.bone):
+                flags[i] = hidden
+        order = []
+        if self.use_filter_sort_alpha:
+            order = helper.sort_items_by_name(items, "name")
+        return flags, order
 
 
 class AT_MT_Metarigs(Menu):
@@ -104,8 +157,7 @@ class AT_MT_Metarigs(Menu):
 
     def draw(self, context):
         layout = self.layout
-        path = os.path.join(get_config_path(), "metarigs")
-        validate_path(path)
+        path = get_config_path("metarigs")
         metarigs = get_file_list_names(path, full_name=False, extension='.py')
         for name in metarigs:
             layout.operator(
@@ -126,8 +178,7 @@ class AT_MT_Delete_Metarigs(Menu):
 
     def draw(self, context):
         layout = self.layout
-        path = os.path.join(get_config_path(), "metarigs")
-        validate_path(path)
+        path = get_config_path("metarigs")
         metarigs = get_file_list_names(path, full_name=False, extension='.py')
         for name in metarigs:
             layout.operator(
@@ -152,6 +203,9 @@ class AT_MT_Template_Submenu(Menu):
         layout.operator("at.rename_template", icon='OUTLINER_DATA_GP_LAYER')
         layout.operator("at.rename_mapping", icon='OUTLINER_DATA_GP_LAYER')
         layout.separator()
+        layout.operator("at.export_mapping_pack", icon='PACKAGE')
+        layout.operator("at.import_mapping_pack", icon='UGLYPACKAGE')
+        layout.separator()
         layout.operator("at.guess_mapping_bones", icon='ZOOM_ALL')
 
 
@@ -213,7 +267,7 @@ class POPOVER_PT_Bone_Layer_Select(Panel):
                 row = col.row(align=True)
             if i == 8 or i == 24:
                 row.separator()
-            row.prop(props(), "armature_layer_" + str(i), text='', toggle=True)
+            row.prop(props(), "armature_layers", index=i, text='', toggle=True)
         op = col.operator("at.select_bone_layers", text='Same Layer Selection')
         op.select = False
         op.invert = False
@@ -242,6 +296,7 @@ class POPOVER_PT_Bone_Layer_Select(Panel):
 
 
 classes = [
+    MAPPING_UL_Search_Bones,
     AT_PT_Armature_Templates,
     AT_MT_Delete_Metarigs,
     AT_MT_Metarigs,